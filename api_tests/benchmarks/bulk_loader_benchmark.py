@@ -0,0 +1,63 @@
+"""
+Benchmark of the COPY bulk loader against a find_or_create loop.
+
+Loads the same generated tags with both paths into the database of
+postgres_configs and prints rows per second. The tags are attached to a
+benchmark user and note, everything created is deleted afterwards.
+
+    cd application && python ../api_tests/benchmarks/bulk_loader_benchmark.py 20000
+"""
+
+import sys
+import uuid
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from application.schemas import Notes, Tags, User
+from application.services.database.database import get_db
+from application.services.database.loader import BulkLoader
+
+
+def tag_rows(count: int, user_uu_id, note_uu_id, prefix: str) -> list[dict]:
+    return [
+        {"name": f"{prefix}-{index}", "user_uu_id": user_uu_id, "note_uu_id": note_uu_id}
+        for index in range(count)
+    ]
+
+
+def main(count: int = 20000) -> None:
+    prefix = f"benchmark-{uuid.uuid4().hex[:8]}"
+    with get_db() as db:
+        user = User.find_or_create(
+            db=db, email=f"{prefix}@benchmark", name="Benchmark", surname="Loader", hashed_password="-"
+        )
+        note = Notes.find_or_create(db=db, title=prefix, content="-", user_uu_id=user.uu_id)
+        user_uu_id, note_uu_id = user.uu_id, note.uu_id
+
+    try:
+        started = time.perf_counter()
+        with get_db() as db:
+            for row in tag_rows(count, user_uu_id, note_uu_id, f"{prefix}-orm"):
+                Tags.find_or_create(db=db, **row)
+        orm_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        loader = BulkLoader(Tags, batch_size=10000, progress=lambda *_: None)
+        copied, merged = loader.load(tag_rows(count, user_uu_id, note_uu_id, f"{prefix}-copy"))
+        copy_elapsed = time.perf_counter() - started
+        assert copied == merged == count
+
+        print(f"find_or_create loop {count / orm_elapsed:10.0f} rows/s {orm_elapsed:8.2f} s")
+        print(f"COPY bulk loader    {count / copy_elapsed:10.0f} rows/s {copy_elapsed:8.2f} s")
+    finally:
+        with get_db() as db:
+            db.query(Tags).filter(Tags.note_uu_id == note_uu_id).delete()
+            db.query(Notes).filter(Notes.uu_id == note_uu_id).delete()
+            db.query(User).filter(User.uu_id == user_uu_id).delete()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
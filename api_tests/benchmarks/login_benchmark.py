@@ -0,0 +1,92 @@
+"""
+Benchmark of the CPU bound work of /auth/login, inline and in the auth executor.
+
+Each login checks a password and signs an access token, as the route does,
+without a database. Logins run concurrently on one event loop while a probe
+coroutine sleeps 5 ms at a time and records how late it wakes up; that
+delay is the event-loop lag every other request would see.
+
+    cd application && python ../api_tests/benchmarks/login_benchmark.py 200 32
+"""
+
+import sys
+import time
+import uuid
+import asyncio
+import statistics
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from application.controllers.auth_controllers import AuthExecutor, PasswordModule
+from application.controllers.token_controllers import jwt_controller
+
+
+CONFIGURATIONS = [
+    ("sha256", 0),
+    ("pbkdf2_sha256", 100000),
+    ("pbkdf2_sha256", 600000),
+    ("scrypt", 14),
+]
+PROBE_INTERVAL = 0.005
+
+
+def login_inline(password_dict: dict) -> str:
+    assert PasswordModule.check_password(**password_dict)
+    return jwt_controller.create_access_token(payload={"email": password_dict["salt"]})
+
+
+async def login_offloaded(executor: AuthExecutor, password_dict: dict) -> str:
+    assert await executor.run(PasswordModule.check_password, **password_dict)
+    return await executor.run(jwt_controller.create_access_token, payload={"email": password_dict["salt"]})
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def run(logins: int, concurrency: int, password_dict: dict, executor) -> tuple[float, list[float]]:
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if executor is None:
+                login_inline(password_dict)
+                await asyncio.sleep(0)  # The inline handler still yields to the loop between requests
+            else:
+                await login_offloaded(executor, password_dict)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    return elapsed, lags
+
+
+def main(logins: int = 200, concurrency: int = 32) -> None:
+    executor = AuthExecutor(workers=4, max_pending=concurrency * 2)
+    print(f"{'algorithm':14} {'cost':>7} {'mode':9} {'logins/s':>10} {'lag p50 ms':>11} {'lag max ms':>11}")
+    for algorithm, cost in CONFIGURATIONS:
+        email, uu_id, password = "benchmark@login", str(uuid.uuid4()), "correct horse battery staple"
+        hashed = PasswordModule.create_hashed_password(email, uu_id, password, algorithm, cost)
+        password_dict = dict(salt=email, id_=uu_id, password=password, password_hashed=hashed)
+        count = logins if algorithm == "sha256" else max(concurrency, logins // 4)
+        for mode, pool in (("inline", None), ("executor", executor)):
+            elapsed, lags = asyncio.run(run(count, concurrency, password_dict, pool))
+            lags = lags or [0.0]
+            print(
+                f"{algorithm:14} {cost:7} {mode:9} {count / elapsed:10.0f} "
+                f"{statistics.median(lags) * 1000:11.2f} {max(lags) * 1000:11.2f}"
+            )
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:3]))
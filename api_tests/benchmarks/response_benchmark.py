@@ -0,0 +1,95 @@
+"""
+Benchmark of rendering and compressing a 50-row page of Notes.
+
+The page, serialized with get_dict as /notes/list returns it, is served by
+a minimal FastAPI app per configuration: response class, route class and
+compression coding. FastJSONRoute skips the jsonable_encoder pass FastAPI
+runs over returned dictionaries. Requests run in process over the ASGI
+transport of httpx, so no server or database is needed. Prints the bytes
+on the wire and the CPU time per request.
+
+    cd application && python ../api_tests/benchmarks/response_benchmark.py 500
+"""
+
+import sys
+import time
+import timeit
+import asyncio
+
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from fastapi import APIRouter, FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import configure_mappers
+
+from serializer_benchmark import ROWS, build_page
+from application.controllers.response_controllers import FastJSONResponse, FastJSONRoute, orjson
+from application.middlewares.compression_middleware import CompressionMiddleware, compressor_factories
+
+
+def build_app(
+    response_class: type[JSONResponse], route_class: type[APIRoute], coding: str, content: dict
+) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+    if coding != "identity":
+        app.add_middleware(CompressionMiddleware, codings=[coding])
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/notes/list")
+    async def notes_list():
+        return content
+
+    app.include_router(router)
+    return app
+
+
+async def run(app: FastAPI, coding: str, requests: int) -> tuple[int, float]:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": coding}
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        response = await client.get("/notes/list", headers=headers)
+        wire_bytes = int(response.headers["content-length"])
+        assert response.headers.get("content-encoding", "identity") == coding
+        started = time.process_time()
+        for _ in range(requests):
+            await client.get("/notes/list", headers=headers)
+        return wire_bytes, (time.process_time() - started) / requests
+
+
+def main(requests: int = 500) -> None:
+    configure_mappers()
+    page = build_page()
+    content = {
+        "data": [row.get_dict() for row in page],
+        "pagination": {"size": ROWS, "page": 1, "totalCount": ROWS, "orderField": ["uu_id"]},
+    }
+    codings = ["identity", *compressor_factories(["zstd", "br", "gzip"], {"zstd": 3, "br": 4, "gzip": 6})]
+    fast = "FastJSONResponse (orjson)" if orjson is not None else "FastJSONResponse (json)"
+    # Rendering alone; FastAPI runs jsonable_encoder on returned dicts with either
+    # response class, FastJSONRoute renders them with FastJSONResponse directly
+    for name, render in (
+        ("jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(content)).body),
+        (f"{fast} alone", lambda: FastJSONResponse(content).body),
+    ):
+        best = min(timeit.repeat(render, number=200, repeat=5)) / 200
+        print(f"render {name:42} {best * 1e6:8.1f} us")
+
+    print(f"{'response class':42} {'coding':9} {'bytes':>8} {'CPU us/request':>15}")
+    for name, response_class, route_class in (
+        ("JSONResponse", JSONResponse, APIRoute),
+        (fast, FastJSONResponse, APIRoute),
+        (f"{fast} + FastJSONRoute", FastJSONResponse, FastJSONRoute),
+    ):
+        for coding in codings:
+            app = build_app(response_class, route_class, coding, content)
+            wire_bytes, cpu = asyncio.run(run(app, coding, requests))
+            print(f"{name:42} {coding:9} {wire_bytes:8} {cpu * 1e6:15.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,84 @@
+"""
+Benchmark of token_middleware with and without the verified-token cache.
+
+Requests go through a minimal FastAPI app wrapping one protected route with
+the middleware, in process over the ASGI transport of httpx, so no server
+or database is needed. A pool of access tokens is reused round robin, as
+the clients of a running API would.
+
+    cd application && python ../api_tests/benchmarks/token_verification_benchmark.py 5000
+"""
+
+import sys
+import time
+import asyncio
+
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from fastapi import FastAPI, Request
+
+from application.controllers.route_controllers import RouteAuthMatcher
+from application.controllers.token_controllers import jwt_controller
+from application.middlewares.token_middleware import token_middleware
+from application.routes.routes import get_safe_endpoint_urls
+
+
+TOKENS = 100
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.state.route_auth = RouteAuthMatcher(get_safe_endpoint_urls())
+
+    @app.middleware("http")
+    async def add_token_middleware(request: Request, call_next):
+        return await token_middleware(request, call_next)
+
+    @app.get("/notes/list")
+    async def protected(request: Request):
+        return {"email": request.state.token_payload["email"]}
+
+    return app
+
+
+async def run(requests: int, tokens: list[str]) -> float:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        for index in range(requests):
+            response = await client.get(
+                "/notes/list", headers={"Authorization": tokens[index % len(tokens)]}
+            )
+            assert response.status_code == 200, response.text
+        return time.perf_counter() - started
+
+
+def verify_only(requests: int, tokens: list[str], verify) -> float:
+    started = time.perf_counter()
+    for index in range(requests):
+        verify(tokens[index % len(tokens)])
+    return time.perf_counter() - started
+
+
+def main(requests: int = 5000) -> None:
+    tokens = [
+        jwt_controller.create_access_token({"email": f"user-{index}@benchmark", "info": {}})
+        for index in range(TOKENS)
+    ]
+    cache = jwt_controller.verified_tokens
+    for label, maxsize in (("no cache", 0), ("verified-token cache", cache.maxsize or 10000)):
+        cache.clear()
+        cache.maxsize = maxsize
+        elapsed = verify_only(requests, tokens, jwt_controller.verify_token_cached)
+        print(f"{label:22} verify     {requests / elapsed:10.0f} tokens/s")
+        cache.clear()
+        elapsed = asyncio.run(run(requests, tokens))
+        print(f"{label:22} middleware {requests / elapsed:10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,118 @@
+"""
+In-process stand-in of a Redis server for the tests of RedisBackend.
+
+Speaks enough RESP for the list result cache: GET, SET (PX, NX), INCR,
+SELECT, AUTH and PING, one thread per connection, keys kept in a dictionary.
+"""
+
+import time
+import socket
+import threading
+import socketserver
+
+from typing import Optional
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.connection)
+
+    def read_command(self) -> Optional[list[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            raise ValueError(f"Expected an array, got {line!r}")
+        parts = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def handle(self):
+        while True:
+            try:
+                command = self.read_command()
+            except (OSError, ValueError):
+                return
+            if command is None:
+                return
+            self.wfile.write(self.server.execute(command))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """
+    Stand-in Redis server on a free local port, started with start().
+
+    Attributes:
+        commands: Names of the commands received, in order
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password: Optional[str] = None):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.password = password
+        self.commands: list[str] = []
+        self.connections: set[socket.socket] = set()
+        self._lock = threading.Lock()
+        self._items: dict[bytes, tuple[Optional[float], bytes]] = {}
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{f':{self.password}@' if self.password else ''}{host}:{port}/1"
+
+    def start(self) -> "RespServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop listening and drop the open connections, as a crashed server would."""
+        self.shutdown()
+        self.server_close()
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            connection.close()
+
+    def _alive(self, key: bytes) -> Optional[bytes]:
+        item = self._items.get(key)
+        if item is not None and item[0] is not None and item[0] < time.monotonic():
+            del self._items[key]
+            return None
+        return item[1] if item is not None else None
+
+    def execute(self, command: list[bytes]) -> bytes:
+        name, args = command[0].decode().upper(), command[1:]
+        with self._lock:
+            self.commands.append(name)
+            if name == "PING":
+                return b"+PONG\r\n"
+            if name == "AUTH":
+                return b"+OK\r\n" if args[0].decode() == self.password else b"-WRONGPASS\r\n"
+            if name == "SELECT":
+                return b"+OK\r\n"
+            if name == "GET":
+                value = self._alive(args[0])
+                return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            if name == "SET":
+                key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+                if b"NX" in options and self._alive(key) is not None:
+                    return b"$-1\r\n"
+                expires = None
+                if b"PX" in options:
+                    expires = time.monotonic() + int(args[2 + options.index(b"PX") + 1]) / 1000
+                self._items[key] = (expires, value)
+                return b"+OK\r\n"
+            if name == "INCR":
+                value = int(self._alive(args[0]) or 0) + 1
+                self._items[args[0]] = (None, str(value).encode())
+                return b":%d\r\n" % value
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
@@ -0,0 +1,99 @@
+"""Typing and matching of the rows of bulk_find_or_create, no database needed."""
+
+import uuid
+import datetime
+import unittest
+
+from types import SimpleNamespace
+from unittest import mock
+
+import testing  # noqa: F401, sets up the paths and settings
+
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from application.schemas.notes.model import Notes
+from application.services.database.controllers.crud_controllers import Credentials
+from application.services.database.controllers.mixin_controllers import CrudCollection
+
+
+class CreditedNote(CrudCollection):
+    __tablename__ = "test_credited_notes"
+
+    title: Mapped[str] = mapped_column(String, nullable=False)
+
+
+USER = uuid.UUID("6f1c1d2e-0d5b-4c55-9a3e-2a9f6f7c1b10")
+CREDENTIALS = Credentials(person_id=7, person_name="Ada")
+
+
+class ColumnValueTest(unittest.TestCase):
+
+    def test_values_are_typed_as_their_column(self):
+        self.assertEqual(Notes.column_value("id", "12"), 12)
+        self.assertEqual(Notes.column_value("user_uu_id", str(USER)), USER)
+        self.assertEqual(Notes.column_value("title", 12), "12")
+        self.assertEqual(
+            Notes.column_value("expiry_starts", "2024-01-02T03:04:05+00:00"),
+            datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        )
+
+    def test_typed_missing_and_unconvertible_values_are_kept(self):
+        self.assertIs(Notes.column_value("user_uu_id", USER), USER)
+        self.assertIsNone(Notes.column_value("id", None))
+        self.assertEqual(Notes.column_value("id", "twelve"), "twelve")
+        self.assertEqual(Notes.column_value("user_uu_id", "not-a-uuid"), "not-a-uuid")
+        self.assertEqual(Notes.column_value("comments", "related"), "related")
+        self.assertEqual(Notes.column_value("unknown", 1), 1)
+
+
+class ConflictKeyTest(unittest.TestCase):
+
+    keys = ["title", "user_uu_id"]
+
+    def test_rows_of_mixed_types_match_the_loaded_record(self):
+        record = SimpleNamespace(title="12", user_uu_id=USER)
+        record_key = Notes.conflict_key(self.keys, lambda key: getattr(record, key))
+        for row in (
+            {"title": "12", "user_uu_id": USER},
+            {"title": 12, "user_uu_id": str(USER)},
+            {"title": "12", "user_uu_id": str(USER).upper()},
+        ):
+            self.assertEqual(Notes.conflict_key(self.keys, row.get), record_key, row)
+
+    def test_bulk_results_pair_mixed_rows_in_input_order(self):
+        other = uuid.UUID(int=1)
+        created = SimpleNamespace(title="new", user_uu_id=USER)
+        existing = SimpleNamespace(title="old", user_uu_id=other)
+        rows = [
+            {"title": "old", "user_uu_id": str(other)},
+            {"title": "new", "user_uu_id": str(USER)},
+            {"title": "new", "user_uu_id": USER},
+            {"title": "lost", "user_uu_id": USER},
+        ]
+        results = Notes.bulk_results(self.keys, rows, inserted=[created], found=[existing])
+        self.assertEqual(results, [(existing, False), (created, True), (created, False), (None, False)])
+
+
+class CredentialsValuesTest(unittest.TestCase):
+
+    def test_tables_without_creator_columns_get_none(self):
+        with mock.patch.object(Notes, "creds", CREDENTIALS):
+            self.assertEqual(Notes.credentials_values(), {})
+            values, keys = Notes.bulk_values([{"title": "a", "content": "b", "user_uu_id": USER}])
+        self.assertEqual(values, [{"title": "a", "content": "b", "user_uu_id": USER}])
+        self.assertEqual(keys, ["title", "content", "user_uu_id"])
+
+    def test_tables_with_creator_columns_are_stamped(self):
+        with mock.patch.object(CreditedNote, "creds", CREDENTIALS):
+            self.assertEqual(CreditedNote.credentials_values(), {"created_by_id": 7, "created_by": "Ada"})
+            values, keys = CreditedNote.bulk_values([{"title": "a", "unknown": 1}])
+        self.assertEqual(values, [{"title": "a", "created_by_id": 7, "created_by": "Ada"}])
+        self.assertEqual(keys, ["title"])
+
+    def test_no_credentials_stamp_nothing(self):
+        self.assertEqual(CreditedNote.credentials_values(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Content coding negotiation of CompressionMiddleware."""
+
+import gzip
+import unittest
+
+import testing  # noqa: F401, sets up the paths and settings
+
+import brotli
+import zstandard
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application.middlewares.compression_middleware import CompressionMiddleware, no_compression
+
+
+BODY = b"notes " * 1000
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, codings=["zstd", "br", "gzip"])
+
+    @app.get("/large")
+    async def large():
+        return {"data": BODY.decode()}
+
+    @app.get("/small")
+    async def small():
+        return {"data": "small"}
+
+    @app.get("/opted-out")
+    @no_compression
+    async def opted_out():
+        return {"data": BODY.decode()}
+
+    return app
+
+
+class CompressionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(build_app())
+
+    def get(self, path: str, accept_encoding: str):
+        with self.client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+            return response, b"".join(response.iter_raw())
+
+    def test_preferred_coding_is_negotiated(self):
+        for accept_encoding, coding, decompress in (
+            ("gzip, br, zstd", "zstd", lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body)),
+            ("gzip, br", "br", brotli.decompress),
+            ("gzip", "gzip", gzip.decompress),
+        ):
+            response, body = self.get("/large", accept_encoding)
+            self.assertEqual(response.headers["content-encoding"], coding)
+            self.assertEqual(int(response.headers["content-length"]), len(body))
+            self.assertIn(BODY, decompress(body))
+
+    def test_refused_coding_is_skipped(self):
+        response, _ = self.get("/large", "zstd;q=0, br;q=0, gzip")
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+
+    def test_small_and_opted_out_bodies_are_sent_as_they_are(self):
+        for path in ("/small", "/opted-out"):
+            response, _ = self.get(path, "zstd, br, gzip")
+            self.assertNotIn("content-encoding", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
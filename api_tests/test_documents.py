@@ -0,0 +1,80 @@
+"""Pre-encoded OpenAPI and documentation pages served by register_documents."""
+
+import gzip
+import unittest
+
+import testing  # noqa: F401, sets up the paths and settings
+
+import brotli
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application.controllers.open_api_controllers import register_documents
+from application.controllers.response_controllers import EncodedBody
+from application.controllers.route_controllers import RouteAuthMatcher
+
+
+def build_app() -> FastAPI:
+    app = FastAPI(openapi_url=None)
+
+    @app.get("/notes/list")
+    async def notes_list():
+        return {"data": []}
+
+    app.state.route_auth = RouteAuthMatcher([])
+    register_documents(app)
+    return app
+
+
+class EncodedDocumentsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(build_app())
+
+    def get(self, path: str, accept_encoding: str, **headers):
+        # Raw bytes of the variant, without the client decoding them
+        with self.client.stream("GET", path, headers={"Accept-Encoding": accept_encoding, **headers}) as response:
+            return response, b"".join(response.iter_raw())
+
+    def test_brotli_variant_is_preferred(self):
+        response, body = self.get("/openapi.json", "gzip, br")
+        self.assertEqual(response.headers["content-encoding"], "br")
+        self.assertIn("Accept-Encoding", response.headers["vary"])
+        identity, plain = self.get("/openapi.json", "identity")
+        self.assertNotIn("content-encoding", identity.headers)
+        self.assertEqual(brotli.decompress(body), plain)
+
+    def test_every_variant_has_its_strong_etag(self):
+        etags = {}
+        for coding in ("identity", "gzip", "br"):
+            response, _ = self.get("/openapi.json", coding)
+            etags[coding] = response.headers["etag"]
+            self.assertFalse(etags[coding].startswith("W/"))
+            self.assertTrue(etags[coding].startswith('"') and etags[coding].endswith('"'))
+        self.assertEqual(len(set(etags.values())), 3)
+        digest = etags["identity"].strip('"')
+        self.assertEqual(etags["br"], f'"{digest}-br"')
+        self.assertEqual(etags["gzip"], f'"{digest}-gzip"')
+
+    def test_gzip_variant_without_brotli(self):
+        response, body = self.get("/docs", "gzip")
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertIn(b"swagger", gzip.decompress(body).lower())
+
+    def test_matching_etag_is_not_modified(self):
+        response, _ = self.get("/openapi.json", "br")
+        not_modified, body = self.get("/openapi.json", "br", **{"If-None-Match": response.headers["etag"]})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(not_modified.headers["etag"], response.headers["etag"])
+
+    def test_variants_are_built_once(self):
+        document = EncodedBody(b'{"openapi":"3.1.0"}', media_type="application/json")
+        self.assertEqual(set(document.variants), {"identity", "gzip", "br"})
+        self.assertEqual(brotli.decompress(document.variants["br"]), b'{"openapi":"3.1.0"}')
+
+
+if __name__ == "__main__":
+    unittest.main()
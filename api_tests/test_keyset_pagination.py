@@ -0,0 +1,93 @@
+"""Keyset pagination of PaginationResult over nullable sort columns."""
+
+import unittest
+
+import testing  # noqa: F401, sets up the paths and settings
+
+from sqlalchemy import Integer, String, create_engine, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+from application.services.database.controllers.pagination_controllers import Pagination, PaginationResult
+from application.services.database.controllers.response_controllers import PostgresResponse
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class RankedItem(Base):
+    __tablename__ = "ranked_items"
+    __sortable_columns__ = {"uu_id": True, "score": True, "name": True}
+
+    uu_id: Mapped[str] = mapped_column(String(8), primary_key=True)
+    score: Mapped[int] = mapped_column(Integer, nullable=True)
+    name: Mapped[str] = mapped_column(String(8))
+
+
+# The NULL scores fall on both sides of the page boundaries with a page size of 2
+ROWS = [("a", 2, "x"), ("b", None, "y"), ("c", 1, "y"), ("d", None, "x"), ("e", 3, "x"), ("f", 1, "x")]
+
+
+class KeysetNullsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine("sqlite://")
+        Base.metadata.create_all(cls.engine)
+        with Session(cls.engine) as session:
+            session.add_all(RankedItem(uu_id=uu_id, score=score, name=name) for uu_id, score, name in ROWS)
+            session.commit()
+
+    def setUp(self):
+        self.session = Session(self.engine)
+
+    def tearDown(self):
+        self.session.close()
+
+    def page(self, order_field: list, order_type: list, cursor: str = None) -> tuple[list, Pagination]:
+        query = self.session.query(RankedItem)
+        data = PostgresResponse(pre_query=query, query=query, model=RankedItem)
+        pagination = Pagination(data, count_mode="none")
+        pagination.size, pagination.orderField, pagination.orderType = 2, order_field, order_type
+        pagination.cursor = cursor
+        records = PaginationResult(data, pagination).keyset_page()
+        return [record.uu_id for record in records], pagination
+
+    def walk(self, order_field: list, order_type: list) -> list:
+        """Follow the next cursors to the end, then the prev cursors back to the start."""
+        pages, (records, pagination) = [], self.page(order_field, order_type)
+        pages.append(records)
+        while pagination.next_cursor:
+            records, pagination = self.page(order_field, order_type, pagination.next_cursor)
+            pages.append(records)
+        backwards = [pages[-1]]
+        while pagination.prev_cursor:
+            records, pagination = self.page(order_field, order_type, pagination.prev_cursor)
+            backwards.insert(0, records)
+        self.assertEqual(backwards, pages)
+        return [uu_id for page in pages for uu_id in page]
+
+    def expected(self, *order) -> list:
+        """Order of the rows by a plain query, NULLs last ascending and first descending."""
+        statement = select(RankedItem.uu_id).order_by(*order)
+        return list(self.session.scalars(statement))
+
+    def test_ascending_nulls_last(self):
+        self.assertEqual(self.walk(["score"], ["asc"]), ["c", "f", "a", "e", "b", "d"])
+
+    def test_descending_nulls_first(self):
+        self.assertEqual(self.walk(["score"], ["desc"]), ["b", "d", "e", "a", "c", "f"])
+
+    def test_mixed_directions(self):
+        self.assertEqual(
+            self.walk(["name", "score"], ["desc", "asc"]),
+            self.expected(RankedItem.name.desc(), RankedItem.score.asc().nulls_last(), RankedItem.uu_id),
+        )
+        self.assertEqual(
+            self.walk(["score", "name"], ["desc", "asc"]),
+            self.expected(RankedItem.score.desc().nulls_first(), RankedItem.name, RankedItem.uu_id),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Pool recycle counting of instrument_engine."""
+
+import time
+import unittest
+
+import testing  # noqa: F401, sets up the paths and settings
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from application.services.database.metrics import TimedQueuePool, instrument_engine
+
+
+class PoolRecyclesTest(unittest.TestCase):
+
+    def engine(self, name: str, pool_recycle: float):
+        engine = create_engine(
+            "sqlite:///:memory:", poolclass=TimedQueuePool, pool_size=1, max_overflow=1, pool_recycle=pool_recycle
+        )
+        instrument_engine(engine, name, pool_recycle=pool_recycle)
+        return engine
+
+    @staticmethod
+    def recycles(name: str) -> float:
+        return REGISTRY.get_sample_value("db_pool_recycles_total", {"engine": name}) or 0
+
+    def test_aged_connection_is_recycled_on_checkout(self):
+        engine = self.engine("recycle_checkout", pool_recycle=0.05)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        time.sleep(0.1)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        self.assertEqual(self.recycles("recycle_checkout"), 1)
+
+    def test_other_closes_of_aged_connections_are_not_recycles(self):
+        engine = self.engine("recycle_other", pool_recycle=0.05)
+        first, overflow = engine.connect(), engine.connect()
+        time.sleep(0.1)
+        first.invalidate()
+        first.close()
+        overflow.close()  # Beyond pool_size, closed on checkin
+        with engine.connect() as connection:  # Connects the invalidated entry again
+            connection.execute(text("SELECT 1"))
+        engine.dispose()
+        self.assertEqual(self.recycles("recycle_other"), 0)
+
+    def test_disabled_recycle_counts_nothing(self):
+        engine = self.engine("recycle_disabled", pool_recycle=-1)
+        with engine.connect():
+            pass
+        time.sleep(0.05)
+        with engine.connect():
+            pass
+        self.assertEqual(self.recycles("recycle_disabled"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
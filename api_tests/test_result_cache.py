@@ -0,0 +1,142 @@
+"""ListResultCache over RedisBackend, against the in-process RESP stand-in server."""
+
+import json
+import time
+import threading
+import unittest
+
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+import testing  # noqa: F401, sets up the paths and settings
+
+from sqlalchemy import Integer, String, create_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+from application.services.database import result_cache
+from application.services.database.result_cache import ListResultCache, RedisBackend
+
+from resp_server import RespServer
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class CachedItem(Base):
+    __tablename__ = "cached_items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(32))
+
+
+OPTIONS = {"page": 1, "size": 10}
+
+
+class Computed:
+    """Compute callable counting its calls, optionally blocking until released."""
+
+    def __init__(self, value, release: threading.Event = None):
+        self.value = value
+        self.release = release
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return self.value
+
+
+class ListResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = RespServer(password="secret").start()
+        self.cache = ListResultCache(RedisBackend(self.server.url), ttl=60, stale_ttl=60)
+
+    def tearDown(self):
+        self.cache._refresher.shutdown(wait=True)
+        self.cache.backend.close()
+        self.server.stop()
+
+    def test_miss_then_hit(self):
+        compute = Computed({"data": [1, 2]})
+        self.assertEqual(self.cache.fetch(CachedItem, OPTIONS, compute), {"data": [1, 2]})
+        self.assertEqual(self.cache.fetch(CachedItem, OPTIONS, compute), {"data": [1, 2]})
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(self.server.commands[:2], ["AUTH", "SELECT"])
+        self.assertIn("SET", self.server.commands)
+
+    def test_options_are_normalized_into_one_entry(self):
+        compute = Computed({"data": []})
+        self.cache.fetch(CachedItem, OPTIONS, compute)
+        self.cache.fetch(CachedItem, {**OPTIONS, "order_field": ["uu_id"], "order_type": ["asc"]}, compute)
+        self.cache.fetch(CachedItem, {**OPTIONS, "page": 2}, compute)
+        self.assertEqual(compute.calls, 2)
+
+    def test_conditional_hit_is_not_modified(self):
+        compute = Computed({"data": [1]})
+        body, etag = self.cache.fetch_conditional(CachedItem, OPTIONS, compute)
+        self.assertEqual(json.loads(body), {"data": [1]})
+        self.assertEqual(self.cache.fetch_conditional(CachedItem, OPTIONS, compute, if_none_match=etag), (None, etag))
+        self.assertEqual(compute.calls, 1)
+
+    def test_stale_entry_is_served_while_one_request_refreshes(self):
+        self.cache.ttl = 0.05
+        self.cache.fetch(CachedItem, OPTIONS, Computed({"data": "old"}))
+        time.sleep(0.1)
+
+        release = threading.Event()
+        compute = Computed({"data": "new"}, release)
+        with ThreadPoolExecutor(max_workers=8) as requests:
+            results = list(requests.map(lambda _: self.cache.fetch(CachedItem, OPTIONS, compute), range(8)))
+        self.assertEqual(results, [{"data": "old"}] * 8)
+
+        self.cache.ttl = 60
+        release.set()
+        self.cache._refresher.shutdown(wait=True)
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(self.cache.fetch(CachedItem, OPTIONS, Computed({"data": "unused"})), {"data": "new"})
+
+    def test_commit_invalidates_the_lists_of_the_written_table(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        compute = Computed({"data": []})
+        self.cache.fetch(CachedItem, OPTIONS, compute)
+
+        with mock.patch.object(result_cache, "list_cache", self.cache):
+            with Session(engine) as session:
+                session.add(CachedItem(name="uncommitted"))
+                session.flush()
+                session.rollback()
+            self.cache.fetch(CachedItem, OPTIONS, compute)
+            self.assertEqual(compute.calls, 1)
+
+            with Session(engine) as session:
+                session.add(CachedItem(name="committed"))
+                session.commit()
+        self.assertEqual(self.cache.backend.get(self.cache.tag_key("cached_items")), b"1")
+        self.cache.fetch(CachedItem, OPTIONS, compute)
+        self.assertEqual(compute.calls, 2)
+
+    def test_failing_backend_falls_back_to_compute(self):
+        compute = Computed({"data": [1]})
+        self.cache.fetch(CachedItem, OPTIONS, compute)
+        self.server.stop()
+
+        with self.assertLogs("application.list_cache", "WARNING"):
+            self.assertEqual(self.cache.fetch(CachedItem, OPTIONS, compute), {"data": [1]})
+        self.assertEqual(compute.calls, 2)
+
+        with self.assertLogs("application.list_cache", "WARNING"):
+            body, etag = self.cache.fetch_conditional(CachedItem, OPTIONS, compute, validate=lambda: "v1")
+            self.assertEqual(self.cache.fetch_conditional(
+                CachedItem, OPTIONS, compute, if_none_match=etag, validate=lambda: "v1"
+            ), (None, etag))
+        self.assertEqual(compute.calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
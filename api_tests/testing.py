@@ -0,0 +1,20 @@
+"""
+Common setup of the tests, imported by every test module before the application.
+
+Tests need no database or server and run with the standard library runner
+from the repository root:
+
+    python -m unittest discover -s api_tests
+"""
+
+import os
+import sys
+
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT / "application")  # The settings read ../api.env and ../postgres.env
+os.environ.setdefault("API_REFRESH_TOKEN_LENGTH", "128")  # Class default is a tuple, see api_config.py
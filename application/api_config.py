@@ -10,8 +10,25 @@ class Configs(BaseSettings):
     DEFAULT_SIZE: int = 10
     MIN_SIZE: int = 5
     MAX_SIZE: int = 50
+    UNINDEXED_SORT: str = "flag"  # "reject", "flag" or "allow" ordering by unindexed columns
+    IDENTITY_CACHE_SIZE: int = 10000
+    IDENTITY_CACHE_TTL: float = 60.0
+    IDENTITY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    LIST_CACHE_BACKEND: str = "none"  # "none", "memory" or "redis"
+    LIST_CACHE_URL: str = "redis://localhost:6379/0"
+    LIST_CACHE_TTL: float = 5.0
+    LIST_CACHE_STALE_TTL: float = 30.0
+    JSON_RESPONSE: str = "fast"  # "fast" (orjson when installed) or "standard" JSONResponse
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes under which responses are sent uncompressed
+    COMPRESSION_CODINGS: str = "zstd,br,gzip"  # Preference order, codings not installed are skipped
     ACCESS_TOKEN_TAG: str = "Authorization"
     REFRESH_TOKEN_TAG: str = "Refresher"
+    PASSWORD_HASH: str = "pbkdf2_sha256"  # "sha256", "pbkdf2_sha256" or "scrypt"
+    PASSWORD_HASH_COST: int = 0  # pbkdf2 iterations or log2 of the scrypt n, 0 for the default
+    AUTH_WORKERS: int = 4
+    AUTH_MAX_PENDING: int = 64
+    TOKEN_CACHE_SIZE: int = 10000  # Verified tokens kept by the token middleware, 0 disables
+    REVOCATION_REFRESH_INTERVAL: float = 30.0  # Seconds between revocation loads without a notification
     ACCESS_TOKEN_LENGTH: int = 72
     REFRESH_TOKEN_LENGTH: int = 128,
     SET_ALEMBIC: int = 0
@@ -1,20 +1,35 @@
 import uvicorn
 
-from controllers.route_controllers import RouteRegisterController
-from controllers.open_api_controllers import create_openapi_schema
-from controllers.alembic_controller import AlembicController
+from contextlib import asynccontextmanager
+
+from application.controllers.route_controllers import RouteAuthMatcher, RouteRegisterController
+from application.controllers.open_api_controllers import create_openapi_schema, register_documents
+from application.controllers.alembic_controller import AlembicController
+from application.controllers.revocation_controllers import token_revocations
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
 
-from middlewares.token_middleware import token_middleware
+from application.middlewares.token_middleware import token_middleware
+from application.middlewares.compression_middleware import CompressionMiddleware
+from application.middlewares.session_middleware import checkout_counter_middleware
 from prometheus_fastapi_instrumentator import Instrumentator
 
-from routes.routes import get_routes
-from services.database.database import get_db
-from application.api_config import Configs
+from application.routes.routes import get_routes, get_safe_endpoint_urls
+from application.services.database.database import get_db
+from application.api_config import Configs, api_configs
+from application.controllers.response_controllers import default_response_class
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """Listen to token revocations while the worker serves requests."""
+    token_revocations.start()
+    yield
+    await run_in_threadpool(token_revocations.stop)
 
 
 def create_app(set_alembic: bool = True):
@@ -28,12 +43,25 @@ def create_app(set_alembic: bool = True):
         title="FastAPI Application",
         description="FastAPI Application with OpenAPI schema configuration, security scheme configuration for Bearer authentication, automatic router registration, response class configuration, and security requirements for protected endpoints.",
         version="0.1.0",
+        openapi_url=None,  # Served pre-encoded by register_documents
+        default_response_class=default_response_class(),
+        lifespan=lifespan,
     )
     application.mount(
         "/application/static",
         StaticFiles(directory="application/static"),
         name="static",
     )
+
+    @application.middleware("http")
+    async def add_token_middleware(request: Request, call_next):
+        return await token_middleware(request, call_next)
+
+    @application.middleware("http")
+    async def add_checkout_counter_middleware(request: Request, call_next):
+        return await checkout_counter_middleware(request, call_next)
+
+    # Outside the token check, preflight requests carry no token and answered errors need CORS headers
     application.add_middleware(
         CORSMiddleware,
         allow_origins=["http://localhost", "http://localhost:8000"],
@@ -42,9 +70,11 @@ def create_app(set_alembic: bool = True):
         allow_headers=["*"],
     )
 
-    @application.middleware("http")
-    async def add_token_middleware(request: Request, call_next):
-        return await token_middleware(request, call_next)
+    application.add_middleware(  # Outermost, so error responses are compressed too
+        CompressionMiddleware,
+        minimum_size=api_configs.COMPRESSION_MINIMUM_SIZE,
+        codings=api_configs.COMPRESSION_CODINGS.split(","),
+    )
 
     @application.get("/", description="Redirect Route", include_in_schema=False)
     async def redirect_to_docs():
@@ -52,7 +82,9 @@ def create_app(set_alembic: bool = True):
 
     route_register = RouteRegisterController(app=application, router_list=get_routes())
     application = route_register.register_routes()
+    application.state.route_auth = RouteAuthMatcher(get_safe_endpoint_urls())
     application.openapi = lambda _=application: create_openapi_schema(_)
+    register_documents(application)
     return application
 
 
@@ -1,7 +1,23 @@
+import hmac
+import asyncio
 import secrets
 import hashlib
+import functools
 
-from application.api_config import Configs
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi.exceptions import HTTPException
+
+from application.api_config import Configs, api_configs
+
+
+# Cost of each hash algorithm when API_PASSWORD_HASH_COST is 0
+DEFAULT_HASH_COSTS = {
+    "sha256": 0,
+    "pbkdf2_sha256": 600000,  # iterations
+    "scrypt": 15,  # log2 of n
+}
 
 
 class PasswordModule:
@@ -11,12 +27,52 @@ class PasswordModule:
         return secrets.token_urlsafe(length)
 
     @staticmethod
-    def create_hashed_password(salt: str, id_: str, password: str):
-        return hashlib.sha256(f"{salt}:{id_}:{password}".encode("utf-8")).hexdigest()
+    def create_hashed_password(
+        salt: str,
+        id_: str,
+        password: str,
+        algorithm: Optional[str] = None,
+        cost: Optional[int] = None,
+    ):
+        """
+        Hash a password, salted with the email and uu_id of the user.
+
+        Args:
+            salt: Email of the user
+            id_: uu_id of the user
+            password: Plain password
+            algorithm: "sha256", "pbkdf2_sha256" or "scrypt", API_PASSWORD_HASH by default
+            cost: Iterations of pbkdf2_sha256 or log2 of the scrypt n, API_PASSWORD_HASH_COST by default
+
+        Returns:
+            Hex digest for sha256, "<algorithm>$<cost>$<hex digest>" otherwise
+        """
+        algorithm = algorithm or api_configs.PASSWORD_HASH
+        cost = cost or api_configs.PASSWORD_HASH_COST or DEFAULT_HASH_COSTS.get(algorithm, 0)
+        salted = f"{salt}:{id_}".encode("utf-8")
+        if algorithm == "sha256":  # Single round, the format of hashes made before PASSWORD_HASH
+            return hashlib.sha256(f"{salt}:{id_}:{password}".encode("utf-8")).hexdigest()
+        if algorithm == "pbkdf2_sha256":
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salted, cost)
+        elif algorithm == "scrypt":
+            digest = hashlib.scrypt(  # Needs 128 * r * n bytes, twice that is allowed
+                password.encode("utf-8"), salt=salted, n=2**cost, r=8, p=1, maxmem=2 * 128 * 8 * 2**cost
+            )
+        else:
+            raise ValueError(f"Unknown password hash algorithm {algorithm}")
+        return f"{algorithm}${cost}${digest.hex()}"
 
     @classmethod
     def check_password(cls, salt: str, id_: str, password: str, password_hashed: str):
-        return cls.create_hashed_password(salt, id_, password) == password_hashed
+        """Check a password against a hash of any supported algorithm and cost."""
+        algorithm, cost = "sha256", 0
+        if password_hashed.count("$") == 2:
+            algorithm, cost, _ = password_hashed.split("$")
+        try:
+            hashed = cls.create_hashed_password(salt, id_, password, algorithm, int(cost))
+        except ValueError:
+            return False
+        return hmac.compare_digest(hashed, password_hashed)
 
     @classmethod
     def generate_access_token(cls):
@@ -25,3 +81,68 @@ class PasswordModule:
     @classmethod
     def generate_refresh_token(cls):
         return cls.generate_token(Configs.REFRESH_TOKEN_LENGTH)
+
+
+class AuthExecutor:
+    """
+    Bounded thread pool of the CPU bound work of authentication.
+
+    Password hashing and JWT signing run here so they do not block the event
+    loop; hashlib releases the GIL while hashing, so the threads hash in
+    parallel. When max_pending calls are already queued or running, new ones
+    are rejected with 503 instead of piling up.
+
+    Attributes:
+        workers: Threads of the pool
+        max_pending: Calls allowed in the pool at once, running or queued
+        pending: Calls currently in the pool
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 64):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="auth")
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a function in the pool and wait for its result.
+
+        Args:
+            func: Function to run
+            *args: Positional arguments of the function
+            **kwargs: Keyword arguments of the function
+
+        Returns:
+            Result of the function
+
+        Raises:
+            HTTPException: 503 if the pool is saturated
+        """
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=503,
+                detail={"message": "Authentication is busy, please retry"},
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.pool, functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+auth_executor = AuthExecutor(workers=api_configs.AUTH_WORKERS, max_pending=api_configs.AUTH_MAX_PENDING)
@@ -1,9 +1,13 @@
+import json
+
 from typing import Dict, Any
 
 from fastapi import FastAPI
-from fastapi.routing import APIRoute
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 
+from application.controllers.response_controllers import EncodedBody
+
 
 class OpenAPISchemaCreator:
     """
@@ -17,10 +21,8 @@ class OpenAPISchemaCreator:
         Args:
             app: FastAPI application instance
         """
-        from routes.routes import get_routes, get_safe_endpoint_urls
-
         self.app = app
-        self.safe_endpoint_list: list[tuple[str, str]] = get_safe_endpoint_urls()
+        self.route_auth = app.state.route_auth  # RouteAuthMatcher of the token middleware
         self.routers_list = self.app.routes
 
     @staticmethod
@@ -56,17 +58,7 @@ class OpenAPISchemaCreator:
             return
 
         # Check if endpoint is in safe list
-        endpoint_path = f"{path}:{method}"
-        list_of_safe_endpoints = [
-            f"{e[0]}:{str(e[1]).lower()}" for e in self.safe_endpoint_list
-        ]
-        print(
-            "endpoint_path",
-            endpoint_path,
-            "list_of_safe_endpoints",
-            list_of_safe_endpoints,
-        )
-        if endpoint_path not in list_of_safe_endpoints:
+        if not self.route_auth.is_public(method.upper(), path):
             if "security" not in schema["paths"][path][method]:
                 schema["paths"][path][method]["security"] = []
             schema["paths"][path][method]["security"].append({"BearerAuth": []})
@@ -93,13 +85,11 @@ class OpenAPISchemaCreator:
             "securitySchemes"
         ] = self._create_security_schemes()
 
-        # Configure route security and responses
-        for route in self.app.routes:
-            if isinstance(route, APIRoute) and route.include_in_schema:
-                path = str(route.path)
-                methods = [str(method).lower() for method in route.methods]
-                for method in methods:
-                    self.configure_route_security(path, method, openapi_schema)
+        # Configure route security and responses, for every operation in the schema
+        # (included routers are not APIRoute instances on recent FastAPI versions)
+        for path, operations in openapi_schema.get("paths", {}).items():
+            for method in list(operations):
+                self.configure_route_security(path, method, openapi_schema)
 
         # Add custom documentation extensions
         openapi_schema["x-documentation"] = {
@@ -126,3 +116,41 @@ def create_openapi_schema(app: FastAPI) -> Dict[str, Any]:
     creator = OpenAPISchemaCreator(app)
     app.openapi_schema = creator.create_schema()
     return app.openapi_schema
+
+
+def register_documents(
+    app: FastAPI,
+    openapi_url: str = "/openapi.json",
+    docs_url: str = "/docs",
+    redoc_url: str = "/redoc",
+) -> None:
+    """
+    Build the OpenAPI schema now and serve it and the documentation pages pre-encoded.
+
+    Each document is serialized once into bytes with gzip and brotli variants
+    and a strong ETag, so no request ever waits for schema generation. The app
+    must be created with openapi_url=None, FastAPI then adds no routes of its own.
+
+    Args:
+        app: FastAPI application instance, with every route registered
+        openapi_url: Path of the OpenAPI schema
+        docs_url: Path of the Swagger UI page
+        redoc_url: Path of the ReDoc page
+    """
+    schema = create_openapi_schema(app)
+    documents = {
+        openapi_url: EncodedBody(
+            json.dumps(schema, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8"),
+            media_type="application/json",
+        ),
+        docs_url: EncodedBody(
+            get_swagger_ui_html(openapi_url=openapi_url, title=f"{app.title} - Swagger UI").body,
+            media_type="text/html; charset=utf-8",
+        ),
+        redoc_url: EncodedBody(
+            get_redoc_html(openapi_url=openapi_url, title=f"{app.title} - ReDoc").body,
+            media_type="text/html; charset=utf-8",
+        ),
+    }
+    for url, document in documents.items():
+        app.add_route(url, document.endpoint, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,264 @@
+import gzip
+import json
+import uuid
+import hashlib
+import inspect
+import datetime
+import functools
+
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from application.api_config import api_configs
+
+try:  # Optional, brotli variants are only built when it is installed
+    import brotli
+except ImportError:
+    brotli = None
+
+try:  # Declared dependency, the standard library encoder is used when it is missing
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_default(value: Any) -> Any:
+    """
+    Encode the values JSON does not handle natively, as jsonable_encoder does.
+
+    get_dict already emits only strings, numbers, booleans and None; this
+    covers the UUIDs, timestamps, decimals and models routes return directly.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def render_json(content: Any) -> bytes:
+    """Encode content as JSONResponse does: UTF-8, no whitespace, non ASCII kept as is."""
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=json_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson, or by a compact stdlib encoder without it.
+
+    Output matches JSONResponse: UTF-8, no whitespace, non ASCII kept as is.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+def default_response_class() -> type[JSONResponse]:
+    """Response class of the routes chosen by API_JSON_RESPONSE: "fast" or "standard"."""
+    return FastJSONResponse if api_configs.JSON_RESPONSE == "fast" else JSONResponse
+
+
+def fast_json_endpoint(endpoint: Callable, status_code: Optional[int] = None) -> Callable:
+    """
+    Wrap an endpoint so the content it returns is rendered by FastJSONResponse at once.
+
+    The Response parameter of the endpoint, or one added to the signature
+    when it has none, carries the status code, headers and cookies the
+    endpoint and its dependencies set, as FastAPI would apply them.
+
+    Args:
+        endpoint: Path operation function
+        status_code: Status code of the route, used when the endpoint sets none
+
+    Returns:
+        Async endpoint returning a Response
+    """
+    signature = inspect.signature(endpoint)
+    response_name = next(
+        (
+            name
+            for name, parameter in signature.parameters.items()
+            if isinstance(parameter.annotation, type) and issubclass(parameter.annotation, Response)
+        ),
+        None,
+    )
+    added = response_name is None
+    if added:
+        response_name = "fast_json_response"
+        signature = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(response_name, inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+            ]
+        )
+    is_coroutine = inspect.iscoroutinefunction(endpoint)
+
+    @functools.wraps(endpoint)
+    async def render(**kwargs: Any) -> Response:
+        sub_response = kwargs.pop(response_name) if added else kwargs[response_name]
+        if is_coroutine:
+            content = await endpoint(**kwargs)
+        else:
+            content = await run_in_threadpool(endpoint, **kwargs)
+        if isinstance(content, Response):
+            return content
+        response = FastJSONResponse(content, status_code=sub_response.status_code or status_code or 200)
+        response.headers.raw.extend(
+            header for header in sub_response.headers.raw if header[0] != b"content-length"
+        )
+        return response
+
+    render.__signature__ = signature
+    return render
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Route rendering the dictionaries and lists its endpoint returns with FastJSONResponse.
+
+    FastAPI runs jsonable_encoder over returned content before any response
+    class renders it, which costs more than the rendering itself on get_dict
+    output. Routes of this class skip it, unless they declare a
+    response_model, a return annotation or a response_class, or
+    API_JSON_RESPONSE is "standard"; those keep the FastAPI path.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        if (
+            default_response_class() is FastJSONResponse
+            and isinstance(kwargs.get("response_model"), DefaultPlaceholder)
+            and isinstance(kwargs.get("response_class"), DefaultPlaceholder)
+            and inspect.signature(endpoint).return_annotation is inspect.Signature.empty
+            and not inspect.isasyncgenfunction(endpoint)
+            and not inspect.isgeneratorfunction(endpoint)
+        ):
+            endpoint = fast_json_endpoint(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set[str]:
+    """
+    Content codings a client accepts.
+
+    Args:
+        accept_encoding: Accept-Encoding header
+
+    Returns:
+        Lower case codings, without those refused with q=0
+    """
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, parameters = item.partition(";")
+        quality = parameters.strip().lower()
+        if quality.startswith("q=") and quality[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def etag_matches(if_none_match: Optional[str], etags: set[str]) -> bool:
+    """Check an If-None-Match header against the current entity tags."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or not candidates.isdisjoint(etags)
+
+
+def conditional_json_response(
+    body: Optional[bytes],
+    etag: str,
+    headers: Optional[dict[str, str]] = None,
+    cache_control: str = "private, no-cache",
+) -> Response:
+    """
+    Response of a conditional GET whose body is already encoded.
+
+    Args:
+        body: JSON body, None when the client already has the current one
+        etag: Opaque entity tag of the body, sent as a weak validator
+        headers: Further headers of the response
+        cache_control: Cache-Control of the response, clients revalidate by default
+
+    Returns:
+        304 Not Modified without a body, or the JSON body
+    """
+    # Weak, as the body is re-encoded (e.g. compressed) on the way without changing its meaning
+    headers = {**(headers or {}), "ETag": f"W/{etag}", "Cache-Control": cache_control}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class EncodedBody:
+    """
+    Response body encoded once, with gzip and brotli variants and strong ETags.
+
+    Every variant has its own entity tag, as a strong validator identifies
+    one exact representation.
+
+    Attributes:
+        media_type: Content-Type of the body
+        cache_control: Cache-Control of the responses
+        variants: Coding -> encoded body, "identity" is the body itself
+        etags: Coding -> entity tag
+    """
+
+    # Preferred codings first
+    CODINGS = ("br", "gzip")
+
+    def __init__(self, body: bytes, media_type: str, cache_control: str = "no-cache"):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etags = {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+            for coding in self.variants
+        }
+        self._all_etags = set(self.etags.values())
+
+    def response(self, request: Request) -> Response:
+        """
+        Response of a request, 304 when the client already has the body.
+
+        Args:
+            request: Incoming request
+
+        Returns:
+            Response with the smallest variant the client accepts
+        """
+        accepted = accepted_encodings(request.headers.get("accept-encoding"))
+        coding = next((coding for coding in self.CODINGS if coding in self.variants and coding in accepted), "identity")
+        headers = {"ETag": self.etags[coding], "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), self._all_etags):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=self.variants[coding], media_type=self.media_type, headers=headers)
+
+    async def endpoint(self, request: Request) -> Response:
+        return self.response(request)
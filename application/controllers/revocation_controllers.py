@@ -0,0 +1,171 @@
+"""
+Revoked access tokens, checked per request without a query.
+
+Access tokens carry a jti claim which is stored in the tokens table at
+login. Revoking sets revoked_at (and ends the validity of the row) and
+sends a NOTIFY on the primary. Every worker keeps the revoked token ids in
+memory: loaded once at startup, then incrementally by revoked_at whenever
+a notification arrives and at least every refresh interval, in case one
+was missed while reconnecting.
+"""
+
+import time
+import select
+import socket
+import threading
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import Engine, func, select as sql_select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from application.api_config import api_configs
+from application.schemas.auth.model import Token
+from application.services.database.database import engine
+
+
+# Channel of the revocation notifications
+REVOCATION_CHANNEL = "token_revocations"
+
+# Revocations committed out of revoked_at order are caught by reading this far back
+REVOCATION_OVERLAP = timedelta(seconds=60)
+
+
+class TokenRevocations:
+    """
+    In-memory set of revoked token ids of one worker.
+
+    A revoked id is kept until every token issued before its revocation has
+    expired anyway, so the set only holds revocations younger than the
+    longest token lifetime.
+
+    Attributes:
+        engine: Engine of the primary database
+        lifetime: Longest lifetime of a token, in seconds
+        refresh_interval: Seconds between loads when no notification arrives
+    """
+
+    def __init__(self, engine: Engine, lifetime: float, refresh_interval: float = 30.0):
+        self.engine = engine
+        self.lifetime = timedelta(seconds=lifetime)
+        self.refresh_interval = refresh_interval
+        self.loaded_until: Optional[datetime] = None
+        self._revoked: dict[str, datetime] = {}  # token id -> moment it can be forgotten
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wakeup: Optional[tuple[socket.socket, socket.socket]] = None  # Interrupts the wait of listen
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, token_id: Optional[str]) -> bool:
+        """Check if a token id was revoked, tokens without an id can not be revoked."""
+        return token_id is not None and token_id in self._revoked
+
+    def refresh(self) -> int:
+        """
+        Load the revocations made since the last load, forget the outdated ones.
+
+        Returns:
+            Number of loaded revocations
+        """
+        since = (
+            self.loaded_until - REVOCATION_OVERLAP
+            if self.loaded_until is not None
+            else datetime.now(tz=timezone.utc) - self.lifetime
+        )
+        statement = sql_select(Token.token, Token.revoked_at).where(Token.revoked_at > since)
+        with self.engine.connect() as connection:
+            now = connection.execute(sql_select(func.now())).scalar()
+            rows = connection.execute(statement).all()
+        with self._lock:
+            for token_id, revoked_at in rows:
+                self._revoked[token_id] = revoked_at + self.lifetime
+            for token_id in [key for key, forget_at in self._revoked.items() if forget_at < now]:
+                del self._revoked[token_id]
+        self.loaded_until = max([now, *(revoked_at for _, revoked_at in rows)])
+        return len(rows)
+
+    def start(self) -> None:
+        """Load the revocations and keep listening to notifications in a daemon thread."""
+        if self._thread is not None:
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error @Token revocations load: {e}")
+        self._stop.clear()
+        self._wakeup = socket.socketpair()
+        self._thread = threading.Thread(target=self.listen, name="token-revocations", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop listening and wait for the thread to close its connection."""
+        self._stop.set()
+        if self._thread is None:
+            return
+        self._wakeup[1].send(b"\0")
+        self._thread.join()
+        self._thread = None
+        for end in self._wakeup:
+            end.close()
+        self._wakeup = None
+
+    def listen(self) -> None:
+        """Refresh on every notification of the revocation channel, reconnecting on errors."""
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self.engine.raw_connection()
+                connection.detach()  # Held for the life of the worker, outside the pool
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {REVOCATION_CHANNEL}")
+                self.refresh()  # Revocations made while not listening
+                while not self._stop.is_set():
+                    select.select([dbapi_connection, self._wakeup[0]], [], [], self.refresh_interval)
+                    if self._stop.is_set():
+                        break
+                    dbapi_connection.poll()
+                    dbapi_connection.notifies.clear()
+                    self.refresh()
+            except Exception as e:
+                print(f"Error @Token revocations listen: {e}")
+                self._stop.wait(min(self.refresh_interval, 5.0))
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+async def revoke_tokens(*args: Any, db: AsyncSession) -> int:
+    """
+    Revoke every not expired token matching filter expressions.
+
+    Every worker is notified once the session commits.
+
+    Args:
+        *args: Filter expressions on Token, as given to filter_all
+        db: Async database session
+
+    Returns:
+        Number of revoked tokens
+    """
+    revoked = await Token.async_update_all(
+        Token.revoked_at.is_(None),
+        *args,
+        db=db,
+        values={"revoked_at": func.now(), "expiry_ends": func.now()},
+    )
+    if revoked:
+        await db.execute(text(f"NOTIFY {REVOCATION_CHANNEL}"))
+    return revoked
+
+
+token_revocations = TokenRevocations(
+    engine=engine,
+    lifetime=max(api_configs.ACCESS_TIME, api_configs.REFRESH_TIME),
+    refresh_interval=api_configs.REVOCATION_REFRESH_INTERVAL,
+)
@@ -1,7 +1,12 @@
-from typing import List
+from typing import Iterable, List
 from fastapi import APIRouter, FastAPI
 
 
+# Trie keys of a {parameter} segment and of the methods allowed at a node
+PARAMETER = "{}"
+METHODS = ""
+
+
 class RouteRegisterController:
 
     def __init__(self, app: FastAPI, router_list: List[APIRouter]):
@@ -12,3 +17,67 @@ class RouteRegisterController:
         for router in self.router_list:
             self.app.include_router(router)
         return self.app
+
+
+class RouteAuthMatcher:
+    """
+    Table of the endpoints reachable without a token, built once at startup.
+
+    Paths without parameters are looked up in a dict of path -> methods, so
+    a request costs one hash lookup and no allocation. Path templates with
+    {parameters} go to a trie of segments, walked in O(path depth) only when
+    such templates are declared. Template paths of the routes themselves
+    match too, so the OpenAPI schema reads the same table.
+
+    Attributes:
+        safe_endpoints: (path template, method) pairs not requiring a token
+    """
+
+    def __init__(self, safe_endpoints: Iterable[tuple[str, str]]):
+        self.safe_endpoints = list(safe_endpoints)
+        static: dict[str, set[str]] = {}
+        self._trie: dict = {}
+        for path, method in self.safe_endpoints:
+            # OPTIONS of a public endpoint is public too, e.g. a preflight not answered by CORS
+            methods = {method.upper(), "OPTIONS"}
+            if method.upper() == "GET":
+                methods.add("HEAD")
+            if "{" not in path:
+                static.setdefault(path, set()).update(methods)
+                continue
+            node = self._trie
+            for segment in path.strip("/").split("/"):
+                node = node.setdefault(PARAMETER if segment.startswith("{") else segment, {})
+            node.setdefault(METHODS, set()).update(methods)
+        self._static: dict[str, frozenset[str]] = {
+            path: frozenset(methods) for path, methods in static.items()
+        }
+
+    def is_public(self, method: str, path: str) -> bool:
+        """
+        Check if an endpoint is reachable without a token.
+
+        Args:
+            method: Upper case HTTP method
+            path: Request path or route path template
+
+        Returns:
+            True if the endpoint is declared safe
+        """
+        methods = self._static.get(path)
+        if methods is not None and method in methods:
+            return True
+        return bool(self._trie) and self._match_template(method, path)
+
+    def _match_template(self, method: str, path: str) -> bool:
+        nodes = [self._trie]
+        for segment in path.strip("/").split("/"):
+            nodes = [
+                child
+                for node in nodes
+                for child in (node.get(segment), node.get(PARAMETER))
+                if child is not None
+            ]
+            if not nodes:
+                return False
+        return any(method in node.get(METHODS, ()) for node in nodes)
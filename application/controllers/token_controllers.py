@@ -1,10 +1,64 @@
 import jwt
+import time
+import hashlib
+import threading
 
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional
 from application.api_config import api_configs
 
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified tokens, SHA-256 digest of the token -> decoded payload.
+
+    Each entry expires at the exp claim of its token, so a cached token is
+    never accepted after it would have been rejected by verification.
+
+    Attributes:
+        maxsize: Maximum number of cached tokens
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._tokens: OrderedDict[bytes, tuple[float, Dict[str, Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Decoded payload of a verified token, None if unknown or expired."""
+        key = self.digest(token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._tokens[key]
+                return None
+            self._tokens.move_to_end(key)
+            return entry[1]
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        """Cache the payload of a verified token, tokens without exp are not cached."""
+        if not self.maxsize or "exp" not in payload:
+            return
+        with self._lock:
+            self._tokens[self.digest(token)] = (float(payload["exp"]), payload)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+
 class JWTTokenController:
     """A class to handle JWT token creation and verification"""
 
@@ -16,6 +70,7 @@ class JWTTokenController:
         self.algorithm = "HS256"
         self.access_time = int(api_configs.ACCESS_TIME)
         self.refresh_time = int(api_configs.REFRESH_TIME)
+        self.verified_tokens = VerifiedTokenCache(maxsize=api_configs.TOKEN_CACHE_SIZE)
 
     def create_token(
         self, payload: Dict[str, Any], expires_in: Optional[int] = None
@@ -85,6 +140,25 @@ class JWTTokenController:
         except jwt.InvalidTokenError:
             raise Exception("Invalid token")
 
+    def verify_token_cached(self, token: str) -> Dict[str, Any]:
+        """
+        Verify and decode a JWT token, reusing the payload of an already verified one
+
+        Args:
+            token (str): JWT token to verify
+
+        Returns:
+            dict: Decoded payload, shared with the cache so it must not be modified
+
+        Raises:
+            Exception: If token has expired or is invalid
+        """
+        if (payload := self.verified_tokens.get(token)) is not None:
+            return payload
+        payload = self.verify_token(token)
+        self.verified_tokens.put(token, payload)
+        return payload
+
 
 # Initialize the JWTToken class
 jwt_controller = JWTTokenController()
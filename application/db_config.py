@@ -10,11 +10,36 @@ class Configs(BaseSettings):
     HOST: str = ""
     PORT: int = 5432
     ENGINE: str = ""
+    ASYNC_ENGINE: str = "postgresql+asyncpg"
+    REPLICA_HOSTS: str = ""  # Comma separated host:port list of streaming replicas
+    REPLICA_STRATEGY: str = "round_robin"  # round_robin or least_connections
+    REPLICA_MAX_LAG: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    SLOW_QUERY_THRESHOLD: float = 0.5  # Seconds after which a statement goes to the slow log
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.0  # Share of slow selects sampled with EXPLAIN ANALYZE
 
     @property
     def url(self):
         return f"{self.ENGINE}://{self.USER}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.DB}"
 
+    @property
+    def async_url(self):
+        return f"{self.ASYNC_ENGINE}://{self.USER}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.DB}"
+
+    @property
+    def replica_urls(self):
+        return [
+            f"{self.ENGINE}://{self.USER}:{self.PASSWORD}@{host.strip()}/{self.DB}"
+            for host in self.REPLICA_HOSTS.split(",") if host.strip()
+        ]
+
+    @property
+    def async_replica_urls(self):
+        return [
+            f"{self.ASYNC_ENGINE}://{self.USER}:{self.PASSWORD}@{host.strip()}/{self.DB}"
+            for host in self.REPLICA_HOSTS.split(",") if host.strip()
+        ]
+
     model_config = SettingsConfigDict(
         env_file="../postgres.env", env_prefix="POSTGRES_"
     )
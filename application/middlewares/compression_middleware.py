@@ -0,0 +1,215 @@
+import zlib
+import functools
+
+from typing import Any, Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from application.controllers.response_controllers import accepted_encodings
+
+try:  # Declared dependencies, a coding whose package is missing is just not offered
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Streaming compressors of each coding share compress, flush_block (emit what is buffered) and finish
+
+
+class GzipCompressor:
+
+    def __init__(self, level: int):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush_block(self) -> bytes:
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush_block(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+
+    def __init__(self, level: int):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush_block(self) -> bytes:
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+def compressor_factories(codings: list[str], levels: dict[str, int]) -> dict[str, Callable[[], Any]]:
+    """
+    Factories of the streaming compressors of the available codings.
+
+    Args:
+        codings: Codings in order of preference
+        levels: Compression level of each coding
+
+    Returns:
+        Coding -> factory, in order of preference, without the uninstalled codings
+    """
+    available = {
+        "zstd": ZstdCompressor if zstandard is not None else None,
+        "br": BrotliCompressor if brotli is not None else None,
+        "gzip": GzipCompressor,
+    }
+    codings = [coding.strip().lower() for coding in codings]
+    return {
+        coding: functools.partial(available[coding], levels[coding])
+        for coding in codings
+        if available.get(coding) is not None
+    }
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """Opt a route out of response compression, e.g. for already compressed or streamed bodies."""
+    endpoint.__compression__ = False
+    return endpoint
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the best coding the client accepts.
+
+    Bodies smaller than minimum_size, responses which already have a
+    Content-Encoding and routes decorated with no_compression are sent as
+    they are. Bodies ending within the first minimum_size bytes are
+    compressed at once with a Content-Length, longer streams chunk by chunk.
+
+    Attributes:
+        app: Wrapped ASGI application
+        minimum_size: Bytes under which a body is not worth compressing
+        compressors: Coding -> compressor factory, in order of preference
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        codings: Optional[list[str]] = None,
+        levels: Optional[dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressors = compressor_factories(
+            codings or ["zstd", "br", "gzip"],
+            {"zstd": 3, "br": 4, "gzip": 6, **(levels or {})},
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding"))
+        coding = next((coding for coding in self.compressors if coding in accepted), None)
+        if coding is None:
+            return await self.app(scope, receive, send)
+        await CompressionResponder(self, coding, scope)(receive, send)
+
+
+class CompressionResponder:
+    """State of the compression of one response."""
+
+    def __init__(self, middleware: CompressionMiddleware, coding: str, scope: Scope):
+        self.middleware = middleware
+        self.coding = coding
+        self.scope = scope
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.compressor: Any = None
+        self.passthrough = False
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+        self.expected: Optional[int] = None
+        self.finished = False
+
+    async def __call__(self, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.middleware.app(self.scope, receive, self.send_compressed)
+
+    def skipped(self, headers: MutableHeaders) -> bool:
+        endpoint = self.scope.get("endpoint")
+        return (
+            "content-encoding" in headers
+            or getattr(endpoint, "__compression__", True) is False
+            or headers.get("content-type", "").startswith("text/event-stream")
+        )
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message  # Held until enough of the body decides the coding
+            headers = MutableHeaders(raw=message["headers"])
+            length = headers.get("content-length")
+            self.expected = int(length) if length is not None else None
+            self.passthrough = self.skipped(headers) or (
+                self.expected is not None and self.expected < self.middleware.minimum_size
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] == "http.response.body" and self.finished:
+            return  # Trailing empty message of a body already sent whole
+        if message["type"] != "http.response.body" or self.passthrough:
+            return await self.send(message)
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.start is not None:
+            # Bodies sent in chunks (e.g. through call_next) are buffered up to minimum_size,
+            # or whole when their Content-Length is known
+            self.buffer.append(body)
+            self.buffered += len(body)
+            if more_body and self.buffered < max(self.middleware.minimum_size, self.expected or 0):
+                return
+            if self.expected is not None and self.buffered >= self.expected:
+                more_body, self.finished = False, True
+            start, self.start = self.start, None
+            body, self.buffer = b"".join(self.buffer), []
+            headers = MutableHeaders(raw=start["headers"])
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                return await self.send({"type": "http.response.body", "body": body})
+            headers.add_vary_header("Accept-Encoding")
+            headers["Content-Encoding"] = self.coding
+            self.compressor = self.middleware.compressors[self.coding]()
+            if not more_body:  # Whole body at hand, its compressed length is known
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(start)
+                return await self.send({"type": "http.response.body", "body": body})
+            del headers["Content-Length"]
+            await self.send(start)
+
+        # Emit what was compressed so far on every chunk, streamed bodies stay live
+        chunk = self.compressor.compress(body)
+        chunk += self.compressor.flush_block() if more_body else self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,16 @@
+from fastapi import Request
+
+from application.services.database.database import CheckoutCounter, request_checkouts
+from application.services.database.metrics import REQUEST_CHECKOUTS
+
+
+async def checkout_counter_middleware(request: Request, call_next):
+    counter = CheckoutCounter()
+    token = request_checkouts.set(counter)
+    try:
+        response = await call_next(request)
+    finally:
+        request_checkouts.reset(token)
+        REQUEST_CHECKOUTS.observe(counter.count)
+    response.headers["X-DB-Checkouts"] = str(counter.count)
+    return response
@@ -1,17 +1,27 @@
 from fastapi import Request, Response
 
+from application.api_config import api_configs
+from application.controllers.token_controllers import jwt_controller
+from application.controllers.revocation_controllers import token_revocations
 
-async def token_middleware(request: Request, call_next):
-    from application.routes.routes import get_safe_endpoint_urls
 
-    base_url = "/".join(request.url.path.split("/")[:3])
-    safe_endpoints = [_[0] for _ in get_safe_endpoint_urls()]
-    if base_url in safe_endpoints:
+async def token_middleware(request: Request, call_next):
+    # RouteAuthMatcher built by create_app
+    if request.app.state.route_auth.is_public(request.method, request.scope["path"]):
         return await call_next(request)
 
-    token = request.headers.get("Authorization")
+    token = request.headers.get(api_configs.ACCESS_TOKEN_TAG)
     if not token:
         return Response(content="Missing token", status_code=400)
+    if token[:7].lower() == "bearer ":
+        token = token[7:].strip()
+
+    try:
+        request.state.token_payload = jwt_controller.verify_token_cached(token)
+    except Exception as e:
+        return Response(content=str(e), status_code=401)
+    if token_revocations.is_revoked(request.state.token_payload.get("jti")):
+        return Response(content="Token has been revoked", status_code=401)
 
     response = await call_next(request)
     return response
@@ -1,78 +1,116 @@
-from fastapi import APIRouter, Request, Response
+from datetime import datetime, timedelta, timezone
 
-from application.controllers.auth_controllers import PasswordModule
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from application.controllers.auth_controllers import PasswordModule, auth_executor
+from application.controllers.response_controllers import FastJSONRoute
 from application.validations.request.auth.auth import RequestLogin, RequestRegister
 from application.controllers.token_controllers import jwt_controller
+from application.controllers.revocation_controllers import revoke_tokens
+from application.schemas.auth.model import Token
 from application.schemas.users.model import User
+from application.services.database.database import get_request_session
 
 
-auth_route = APIRouter(prefix="/auth", tags=["Auth"])
+auth_route = APIRouter(prefix="/auth", tags=["Auth"], route_class=FastJSONRoute)
 
 
 @auth_route.post("/login", description="Login Route")
-async def login(request: Request, login_data: RequestLogin, response: Response):
+async def login(
+    request: Request,
+    login_data: RequestLogin,
+    response: Response,
+    db_session: AsyncSession = Depends(get_request_session, scope="function"),
+):
     headers = dict(request.headers)
-    with User.new_session() as db_session:
-        active_user = User.filter_one(User.email == login_data.email, db=db_session)
-        if not active_user.count:
-            return {
-                "completed": False,
-                "message": "User not found",
-                "info": {
-                    "host": headers.get("host", "Not Found"),
-                    "user_agent": headers.get("user-agent", "Not Found"),
-                },
-            }
-        active_user_data = active_user.data
-        active_user_dict = active_user_data.get_dict(exclude_list=[User.hashed_password])
-        password_dict = dict(password=login_data.password, salt=login_data.email, id_=active_user_data.uu_id)
-        hashed_password = PasswordModule.create_hashed_password(**password_dict)
-        if hashed_password != active_user_data.hashed_password:
-            return {
-                "completed": False,
-                "message": "Password is incorrect",
-                "user": active_user_dict,
-                "info": {
-                    "host": headers.get("host", "Not Found"),
-                    "user_agent": headers.get("user-agent", "Not Found"),
-                },
-            }
-        access_token = jwt_controller.create_access_token(
-            payload={
-                "email": login_data.email,
-                "info": {
-                    "host": headers.get("host", "Not Found"),
-                    "user_agent": headers.get("user-agent", "Not Found"),
-                },
-            }
-        )
-        response.headers["Authorization"] = access_token
+    active_user = await User.async_filter_one(User.email == login_data.email, db=db_session)
+    if not active_user.count:
         return {
-            "completed": True, "message": "Access Token Created", "user": active_user_dict, "access_token": access_token
+            "completed": False,
+            "message": "User not found",
+            "info": {
+                "host": headers.get("host", "Not Found"),
+                "user_agent": headers.get("user-agent", "Not Found"),
+            },
+        }
+    active_user_data = active_user.data
+    active_user_dict = active_user_data.get_dict(exclude_list=[User.hashed_password])
+    password_dict = dict(
+        password=login_data.password,
+        salt=login_data.email,
+        id_=active_user_data.uu_id,
+        password_hashed=active_user_data.hashed_password,
+    )
+    if not await auth_executor.run(PasswordModule.check_password, **password_dict):
+        return {
+            "completed": False,
+            "message": "Password is incorrect",
+            "user": active_user_dict,
+            "info": {
+                "host": headers.get("host", "Not Found"),
+                "user_agent": headers.get("user-agent", "Not Found"),
+            },
+        }
+    token_id = PasswordModule.generate_token()
+    access_token = await auth_executor.run(
+        jwt_controller.create_access_token,
+        payload={
+            "jti": token_id,
+            "email": login_data.email,
+            "info": {
+                "host": headers.get("host", "Not Found"),
+                "user_agent": headers.get("user-agent", "Not Found"),
+            },
         }
+    )
+    await Token.async_create_or_abort(  # Stored so the token can be revoked
+        db=db_session,
+        token=token_id,
+        user_uu_id=active_user_data.uu_id,
+        expiry_ends=datetime.now(tz=timezone.utc) + timedelta(seconds=jwt_controller.access_time),
+    )
+    response.headers["Authorization"] = access_token
+    return {
+        "completed": True, "message": "Access Token Created", "user": active_user_dict, "access_token": access_token
+    }
+
+
+@auth_route.post("/logout", description="Revoke the access token of the request")
+async def logout(
+    request: Request,
+    db_session: AsyncSession = Depends(get_request_session, scope="function"),
+):
+    token_id = request.state.token_payload.get("jti")
+    revoked = await revoke_tokens(Token.token == token_id, db=db_session) if token_id else 0
+    return {
+        "completed": bool(revoked),
+        "message": "Access Token Revoked" if revoked else "Access Token can not be revoked",
+    }
 
 
 @auth_route.post("/register", description="Register Route")
 async def register(
-    register_data: RequestRegister, request: Request, response: Response
+    register_data: RequestRegister,
+    request: Request,
+    response: Response,
+    new_session: AsyncSession = Depends(get_request_session, scope="function"),
 ):
-    with User.new_session() as new_session:
-        dict_user = register_data.model_dump()
-        dict_user['hashed_password'] = "some_password_before_hashing"
-        user_created = User.find_or_create(
-            **dict_user, exclude_args=[User.hashed_password], db=new_session
-        )
-        if user_created.meta_data.created:
-            password_dict = dict(password=register_data.password, salt=register_data.email, id_=user_created.uu_id)
-            hashed_password = PasswordModule.create_hashed_password(**password_dict)
-            user_created.update(db=new_session, hashed_password=hashed_password)
-            user_created.save(db=new_session)
+    dict_user = register_data.model_dump()
+    dict_user['hashed_password'] = "some_password_before_hashing"
+    user_created = await User.async_find_or_create(
+        **dict_user, exclude_args=[User.hashed_password], db=new_session
+    )
+    if user_created.meta_data.created:
+        password_dict = dict(password=register_data.password, salt=register_data.email, id_=user_created.uu_id)
+        hashed_password = await auth_executor.run(PasswordModule.create_hashed_password, **password_dict)
+        await user_created.async_update(db=new_session, hashed_password=hashed_password)
 
-        return_message = f"User email: {user_created.email} is already registered successfully. You can login with it."
-        if completed := user_created.meta_data.created:
-            return_message = f"User email: {user_created.email} is now registered. You can login now."
-        return {
-            "completed": completed,
-            "message": return_message,
-            "data": user_created.get_dict(exclude_list=[User.hashed_password])
-        }
+    return_message = f"User email: {user_created.email} is already registered successfully. You can login with it."
+    if completed := user_created.meta_data.created:
+        return_message = f"User email: {user_created.email} is now registered. You can login now."
+    return {
+        "completed": completed,
+        "message": return_message,
+        "data": user_created.get_dict(exclude_list=[User.hashed_password])
+    }
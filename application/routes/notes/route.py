@@ -1,18 +1,57 @@
+from typing import Optional
+
 from fastapi import APIRouter, Request, Response
+from starlette.concurrency import run_in_threadpool
+
 from application.validations.request.auth.auth import RequestLogin, RequestRegister
 from application.validations.request.list_options.list_options import ListOptions
 from application.schemas.notes.model import Notes, Tags, Comments
+from application.services.database.database import get_db
+from application.controllers.response_controllers import FastJSONRoute, conditional_json_response
+from application.services.database.result_cache import list_cache
+from application.services.database.controllers.response_controllers import PostgresResponse
+from application.services.database.controllers.pagination_controllers import (
+    Pagination,
+    PaginationResult,
+)
 
 
-notes_route = APIRouter(prefix="/notes", tags=["Notes"])
+notes_route = APIRouter(prefix="/notes", tags=["Notes"], route_class=FastJSONRoute)
 
 
 @notes_route.get("/list", description="List Notes")
-async def notes_list(request: Request, login_data: ListOptions, response: Response):
-    print("headers", dict(request.headers))
-    response.headers["X-Cat-Dog"] = "alone in the world"
-    print("login_data", login_data)
-    return {"message": "an endpoint"}
+async def notes_list(request: Request, list_options: ListOptions):
+
+    def filter_notes(db) -> PostgresResponse:
+        filters = [
+            Notes.__table__.c[key] == value
+            for key, value in (list_options.query or {}).items()
+            if key in Notes.__table__.c
+        ]
+        return Notes.filter_all(*filters, db=db, live_only=True)
+
+    def compute_list() -> dict:
+        with get_db() as db:
+            notes = filter_notes(db)
+            pagination = Pagination(notes)
+            pagination.change(**list_options.model_dump(exclude_none=True))
+            data = PaginationResult(notes, pagination).data
+            return {"data": data, "pagination": pagination.as_dict()}
+
+    def validate_list() -> Optional[str]:
+        with get_db() as db:
+            return filter_notes(db).validator
+
+    # The page is read with a sync session, keep it off the event loop
+    body, etag = await run_in_threadpool(
+        list_cache.fetch_conditional,
+        Notes,
+        list_options,
+        compute_list,
+        if_none_match=request.headers.get("if-none-match"),
+        validate=validate_list,
+    )
+    return conditional_json_response(body, etag, headers={"X-Cat-Dog": "alone in the world"})
 
 
 @notes_route.post("/create", description="Create Note with UUID")
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Request, Response
 from application.validations.request.auth.auth import RequestLogin, RequestRegister
+from application.controllers.response_controllers import FastJSONRoute
 
 
-users_route = APIRouter(prefix="/users", tags=["Users"])
+users_route = APIRouter(prefix="/users", tags=["Users"], route_class=FastJSONRoute)
 
 
 @users_route.get("/list", description="List Users")
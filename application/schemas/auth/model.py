@@ -1,16 +1,20 @@
 from application.services.database.controllers.mixin_controllers import CrudMixin
 
-from sqlalchemy import ForeignKey, String, UUID
+from sqlalchemy import TIMESTAMP, ForeignKey, String, UUID
 from sqlalchemy.orm import mapped_column, relationship, Mapped
 
 
 class Token(CrudMixin):
 
     __tablename__ = "tokens"
+    __identity_cache__ = True
 
     token: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
     user_uu_id: Mapped[str] = mapped_column(
         UUID, ForeignKey("users.uu_id"), nullable=False
     )
+    revoked_at: Mapped[TIMESTAMP] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True, index=True, comment="Token revocation timestamp"
+    )
 
     user = relationship("User", back_populates="tokens")
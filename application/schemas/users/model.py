@@ -7,6 +7,7 @@ from sqlalchemy.orm import mapped_column, Mapped, relationship
 class User(CrudMixin):
 
     __tablename__ = "users"
+    __identity_cache__ = True
 
     email: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
@@ -0,0 +1,183 @@
+"""
+Read-through identity cache of rows looked up by unique keys.
+
+Models opt in with `__identity_cache__ = True`. Their rows are cached by
+value under uu_id and every single column unique key, bounded by entry
+count, TTL and approximate memory. Entries are invalidated from the session
+`after_commit` event for every row the transaction flushed as changed or
+deleted, and for whole models touched by bulk UPDATE/DELETE statements.
+"""
+
+import sys
+import time
+import threading
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from application.api_config import api_configs
+from application.services.database.metrics import (
+    IDENTITY_CACHE_BYTES,
+    IDENTITY_CACHE_ENTRIES,
+    IDENTITY_CACHE_LOOKUPS,
+)
+
+
+# Session.info key of the (model, identity) pairs to invalidate once committed
+PENDING_INVALIDATIONS = "identity_cache_pending"
+
+
+class IdentityCache:
+    """
+    In-process LRU cache of column values by (model, column, value).
+
+    Every row is stored once under its identity (primary key) and reached
+    through one alias per cached key, so all of them go away together. Key
+    values are compared by their string form, so a uu_id given as a string
+    reaches the row cached with its UUID.
+
+    Attributes:
+        maxsize: Maximum number of cached rows
+        ttl: Seconds a row is trusted after it was read from the database
+        max_bytes: Approximate memory bound of the cached values
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0, max_bytes: int = 32 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._lock = threading.Lock()
+        # (model, identity) -> (values, aliases, expires at, size), in LRU order
+        self._rows: OrderedDict[tuple[str, Hashable], tuple[dict, list, float, int]] = OrderedDict()
+        self._aliases: dict[tuple[str, str, Any], tuple[str, Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, model: str, column: str, value: Any) -> Optional[dict]:
+        """
+        Read the column values of a row by one of its keys.
+
+        Args:
+            model: Model name
+            column: Cached key column
+            value: Key value
+
+        Returns:
+            Column values, None on a miss or an expired entry
+        """
+        with self._lock:
+            row_key = self._aliases.get((model, column, str(value)))
+            entry = self._rows.get(row_key) if row_key else None
+            if entry is None or entry[2] < time.monotonic():
+                if entry is not None:
+                    self._drop(row_key)
+                IDENTITY_CACHE_LOOKUPS.labels(model, "miss").inc()
+                return None
+            self._rows.move_to_end(row_key)
+        IDENTITY_CACHE_LOOKUPS.labels(model, "hit").inc()
+        return entry[0]
+
+    def put(self, model: str, identity: Hashable, values: dict, keys: list[str]) -> None:
+        """
+        Cache the column values of a row.
+
+        Args:
+            model: Model name
+            identity: Primary key identity of the row
+            values: Column values
+            keys: Columns the row is reachable by
+        """
+        size = sum(sys.getsizeof(value) for value in values.values())
+        aliases = [(model, key, str(values[key])) for key in keys if values.get(key) is not None]
+        with self._lock:
+            self._drop((model, identity))
+            self._rows[(model, identity)] = (values, aliases, time.monotonic() + self.ttl, size)
+            for alias in aliases:
+                self._aliases[alias] = (model, identity)
+            self.size_bytes += size
+            while self._rows and (len(self._rows) > self.maxsize or self.size_bytes > self.max_bytes):
+                self._drop(next(iter(self._rows)))
+
+    def invalidate(self, model: str, identity: Optional[Hashable] = None) -> None:
+        """
+        Forget a row, or every row of a model when no identity is given.
+
+        Args:
+            model: Model name
+            identity: Primary key identity of the row
+        """
+        with self._lock:
+            if identity is not None:
+                self._drop((model, identity))
+                return
+            for row_key in [row_key for row_key in self._rows if row_key[0] == model]:
+                self._drop(row_key)
+
+    def clear(self) -> None:
+        """Forget every row."""
+        with self._lock:
+            self._rows.clear()
+            self._aliases.clear()
+            self.size_bytes = 0
+
+    def _drop(self, row_key: tuple[str, Hashable]) -> None:
+        entry = self._rows.pop(row_key, None)
+        if entry is None:
+            return
+        for alias in entry[1]:
+            if self._aliases.get(alias) == row_key:
+                del self._aliases[alias]
+        self.size_bytes -= entry[3]
+
+
+identity_cache = IdentityCache(
+    maxsize=api_configs.IDENTITY_CACHE_SIZE,
+    ttl=api_configs.IDENTITY_CACHE_TTL,
+    max_bytes=api_configs.IDENTITY_CACHE_MAX_BYTES,
+)
+IDENTITY_CACHE_ENTRIES.set_function(lambda: len(identity_cache))
+IDENTITY_CACHE_BYTES.set_function(lambda: identity_cache.size_bytes)
+
+
+def is_cached(model: Any) -> bool:
+    """Check if a model opted in to the identity cache."""
+    return bool(getattr(model, "__identity_cache__", False))
+
+
+@event.listens_for(Session, "after_flush")
+def collect_invalidations(session: Session, flush_context) -> None:
+    """Remember the cached rows this flush changed, they are invalidated on commit."""
+    pending = session.info.setdefault(PENDING_INVALIDATIONS, set())
+    for instance in [*session.dirty, *session.deleted]:
+        state = inspect(instance)
+        if is_cached(type(instance)) and state.identity is not None:
+            pending.add((type(instance).__name__, state.identity))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_bulk_invalidations(orm_execute_state) -> None:
+    """Bulk UPDATE/DELETE statements may touch any row of their model."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and is_cached(mapper.class_):
+        pending = orm_execute_state.session.info.setdefault(PENDING_INVALIDATIONS, set())
+        pending.add((mapper.class_.__name__, None))
+
+
+@event.listens_for(Session, "after_commit")
+def apply_invalidations(session: Session) -> None:
+    """Invalidate the rows the committed transaction changed."""
+    for model, identity in session.info.pop(PENDING_INVALIDATIONS, ()):
+        identity_cache.invalidate(model, identity)
+
+
+@event.listens_for(Session, "after_rollback")
+def drop_invalidations(session: Session) -> None:
+    """Rolled back changes never reached other sessions, the cache stays valid."""
+    session.info.pop(PENDING_INVALIDATIONS, None)
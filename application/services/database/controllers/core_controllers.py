@@ -1,12 +1,16 @@
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
 from typing import Type, TypeVar
 
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from fastapi import status
 from fastapi.exceptions import HTTPException
 
-from application.services.database.database import get_db
+from application.services.database.database import get_db, get_async_db
+from application.services.database.metrics import instrumented
+from application.services.database.routing import stick_to_primary
 
 
 # Type variable for class methods returning self
@@ -24,13 +28,19 @@ class BaseAlchemyModel:
     __abstract__ = True
 
     @classmethod
-    def new_session(cls) -> Session:
-        """Get database session."""
+    def new_session(cls) -> AbstractContextManager[Session]:
+        """Get database session, use as `with Model.new_session() as db`."""
 
-        with get_db() as session:
-            return session
+        return get_db()
 
     @classmethod
+    def new_async_session(cls) -> AbstractAsyncContextManager[AsyncSession]:
+        """Get async database session, use as `async with Model.new_async_session() as db`."""
+
+        return get_async_db()
+
+    @classmethod
+    @instrumented()
     def flush(cls: Type[T], db: Session) -> T:
         """
         Flush the current session to the database.
@@ -55,6 +65,7 @@ class BaseAlchemyModel:
                 },
             )
 
+    @instrumented()
     def destroy(self: Type[T], db: Session) -> None:
         """
         Delete the record from the database.
@@ -62,9 +73,11 @@ class BaseAlchemyModel:
         Args:
             db: Database session
         """
+        stick_to_primary(db)
         db.delete(self)
 
     @classmethod
+    @instrumented()
     def save(cls: Type[T], db: Session) -> None:
         """
         Commit changes to database.
@@ -75,6 +88,7 @@ class BaseAlchemyModel:
         Raises:
             HTTPException: If commit fails
         """
+        stick_to_primary(db)
         try:
             db.commit()
             db.flush()
@@ -106,3 +120,85 @@ class BaseAlchemyModel:
             db: Database session
         """
         db.rollback()
+
+    @classmethod
+    @instrumented()
+    async def async_flush(cls: Type[T], db: AsyncSession) -> T:
+        """
+        Flush the current async session to the database.
+
+        Args:
+            db: Async database session
+
+        Returns:
+            Self instance
+
+        Raises:
+            HTTPException: If database operation fails
+        """
+        try:
+            await db.flush()
+            return cls
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail={
+                    "message": "Database operation failed",
+                },
+            )
+
+    @instrumented()
+    async def async_destroy(self: Type[T], db: AsyncSession) -> None:
+        """
+        Delete the record from the database.
+
+        Args:
+            db: Async database session
+        """
+        stick_to_primary(db)
+        await db.delete(self)
+
+    @classmethod
+    @instrumented()
+    async def async_save(cls: Type[T], db: AsyncSession) -> None:
+        """
+        Commit changes to database.
+
+        Args:
+            db: Async database session
+
+        Raises:
+            HTTPException: If commit fails
+        """
+        stick_to_primary(db)
+        try:
+            await db.commit()
+            await db.flush()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail={
+                    "message": "Alchemy save operation failed",
+                    "error": str(e),
+                },
+            )
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={
+                    "message": "Unknown exception raised.",
+                    "error": str(e),
+                },
+            )
+
+    @classmethod
+    async def async_rollback(cls: Type[T], db: AsyncSession) -> None:
+        """
+        Rollback current transaction.
+
+        Args:
+            db: Async database session
+        """
+        await db.rollback()
@@ -1,7 +1,10 @@
-import arrow
+import uuid
 import datetime
 
-from typing import Optional, Any, Dict
+from typing import Callable, Optional, Any, Dict
+from sqlalchemy import func, inspect, select, tuple_, update as sql_update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, Mapped
 from pydantic import BaseModel
 from fastapi.exceptions import HTTPException
@@ -10,6 +13,39 @@ from decimal import Decimal
 from sqlalchemy import TIMESTAMP, NUMERIC
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 
+from application.services.database.metrics import instrumented
+from application.services.database.routing import stick_to_primary
+
+
+def round_number(value: Any) -> float:
+    """Serialize a float or numeric value with 3 decimals."""
+    return round(float(value), 3)
+
+
+# Formatted "+HH:MM" suffix per UTC offset, naive timestamps are taken as UTC
+_zone_suffixes: dict[Optional[datetime.timedelta], str] = {None: "+00:00"}
+
+
+def format_timestamp(value: Any) -> str:
+    """
+    Format a timestamp as "YYYY-MM-DD HH:mm:ss +HH:MM".
+
+    Args:
+        value: Datetime, or ISO 8601 string of a value not yet loaded from the database
+
+    Returns:
+        Formatted timestamp
+    """
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.fromisoformat(str(value))
+    offset = value.utcoffset()
+    suffix = _zone_suffixes.get(offset)
+    if suffix is None:
+        minutes = int(offset.total_seconds()) // 60
+        sign = "-" if minutes < 0 else "+"
+        suffix = _zone_suffixes[offset] = f"{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+    return f"{value.isoformat(' ', 'seconds')[:19]} {suffix}"
+
 
 class Credentials(BaseModel):
     """
@@ -48,6 +84,20 @@ class CRUDModel:
             record_created.created_by = cls.creds.person_name
         return
 
+    @classmethod
+    def credentials_values(cls) -> Dict[str, Any]:
+        """
+        Column values create_credentials sets, for records inserted in bulk.
+
+        Returns:
+            Dictionary of created_by_id and created_by, without the columns the table lacks
+        """
+        if not (getattr(cls.creds, "person_id", None) and getattr(cls.creds, "person_name", None)):
+            return {}
+        credentials = {"created_by_id": cls.creds.person_id, "created_by": cls.creds.person_name}
+        # CrudMixin tables do not track their creator
+        return {key: value for key, value in credentials.items() if key in cls.__table__.c}
+
     @classmethod
     def raise_exception(cls):
         raise HTTPException(
@@ -58,6 +108,7 @@ class CRUDModel:
         )
 
     @classmethod
+    @instrumented()
     def create_or_abort(cls, db: Session, **kwargs):
         """
         Create a new record or abort if it already exists.
@@ -70,9 +121,10 @@ class CRUDModel:
             New record if successfully created
         """
 
+        stick_to_primary(db)  # Read and write on the primary
         # Search for existing record
         query = db.query(cls).filter(
-            cls.expiry_ends > str(arrow.now()), cls.expiry_starts <= str(arrow.now()),
+            cls.expiry_ends > func.now(), cls.expiry_starts <= func.now(),
         )
 
         for key, value in kwargs.items():
@@ -94,57 +146,155 @@ class CRUDModel:
         return created_record
 
     @classmethod
-    def iterate_over_variables(cls, val: Any, key: str) -> tuple[bool, Optional[Any]]:
+    @instrumented()
+    async def async_create_or_abort(cls, db: AsyncSession, **kwargs):
         """
-        Process a field value based on its type and convert it to the appropriate format.
+        Create a new record or abort if it already exists.
 
         Args:
-            val: Field value
-            key: Field name
+            db: Async database session
+            **kwargs: Record fields
 
         Returns:
-            Tuple of (should_include, processed_value)
+            New record if successfully created
         """
-        key_ = cls.__annotations__.get(key, None)
-        is_primary = key in cls.primary_keys
-        row_attr = bool(getattr(getattr(cls, key), "foreign_keys", None))
 
-        # Skip primary keys and foreign keys
-        if is_primary or row_attr:
-            return False, None
+        stick_to_primary(db)  # Read and write on the primary
+        # Search for existing record
+        statement = select(cls).where(
+            cls.expiry_ends > func.now(), cls.expiry_starts <= func.now(),
+        )
 
-        if val is None:  # Handle None values
-            return True, None
+        for key, value in kwargs.items():
+            if hasattr(cls, key):
+                statement = statement.where(getattr(cls, key) == value)
+
+        already_record = (await db.scalars(statement.limit(1))).first()
+        # Handle existing record
+        if already_record:
+            cls.raise_exception()
+
+        # Create new record
+        created_record = cls()
+        for key, value in kwargs.items():
+            setattr(created_record, key, value)
+        cls.create_credentials(created_record)
+        db.add(created_record)
+        await db.flush()
+        return created_record
+
+    @classmethod
+    def converter_of(cls, key: str) -> Optional[Callable[[Any], Any]]:
+        """
+        Choose the function converting a column value to its response format.
+
+        Args:
+            key: Column attribute name
+
+        Returns:
+            Converter of non-None values, None if the column is not serialized
+        """
+        column = inspect(cls).columns[key]
+        if column.primary_key or column.foreign_keys:  # Skip primary keys and foreign keys
+            return None
 
         if str(key[-5:]).lower() == "uu_id":  # Special handling for UUID fields
-            return True, str(val)
+            return str
 
+        key_ = cls.__annotations__.get(key, None)
         if key_:        # Handle typed fields
-            if key_ == Mapped[int]:
-                return True, int(val)
-            elif key_ == Mapped[bool]:
-                return True, bool(val)
-            elif key_ == Mapped[float] or key_ == Mapped[NUMERIC]:
-                return True, round(float(val), 3)
-            elif key_ == Mapped[TIMESTAMP]:
-                return True, str(arrow.get(str(val)).format("YYYY-MM-DD HH:mm:ss ZZ"))
-            elif key_ == Mapped[str]:
-                return True, str(val)
-        else:           # Handle based on Python types
-            if isinstance(val, datetime.datetime):
-                return True, str(arrow.get(str(val)).format("YYYY-MM-DD HH:mm:ss ZZ"))
-            elif isinstance(val, bool):
-                return True, bool(val)
-            elif isinstance(val, (float, Decimal)):
-                return True, round(float(val), 3)
-            elif isinstance(val, int):
-                return True, int(val)
-            elif isinstance(val, str):
-                return True, str(val)
-            elif val is None:
-                return True, None
-
-        return False, None
+            return {
+                Mapped[int]: int,
+                Mapped[bool]: bool,
+                Mapped[float]: round_number,
+                Mapped[NUMERIC]: round_number,
+                Mapped[TIMESTAMP]: format_timestamp,
+                Mapped[str]: str,
+            }.get(key_)
+
+        try:            # Handle based on Python types
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return None
+        if issubclass(python_type, datetime.datetime):
+            return format_timestamp
+        if issubclass(python_type, bool):
+            return bool
+        if issubclass(python_type, (float, Decimal)):
+            return round_number
+        if issubclass(python_type, int):
+            return int
+        if issubclass(python_type, str):
+            return str
+        return None
+
+    @classmethod
+    def serializer_plan(cls, excluded: frozenset[str] = frozenset()) -> tuple[tuple[str, Callable[[Any], Any]], ...]:
+        """
+        Compile the (key, converter) pairs get_dict applies, once per model and exclusion set.
+
+        Args:
+            excluded: Attribute names left out of the dictionary
+
+        Returns:
+            Pairs of serialized column names and their converters
+        """
+        plans = cls.__dict__.get("__serializer_plans__")
+        if plans is None:
+            plans = {}
+            setattr(cls, "__serializer_plans__", plans)
+        plan = plans.get(excluded)
+        if plan is None:
+            keys = [
+                key for key in cls.columns
+                if (str(key)[-2:] != "id" or str(key)[-5:].lower() == "uu_id") and key not in excluded
+            ]
+            converters = [(key, cls.converter_of(key)) for key in keys]
+            plan = plans[excluded] = tuple((key, convert) for key, convert in converters if convert)
+        return plan
+
+    @classmethod
+    def projection_plan(cls, fields: list[str]) -> tuple[tuple[str, Callable[[Any], Any]], ...]:
+        """
+        Pick the serializer plan entries of the requested fields, in the requested order.
+
+        Args:
+            fields: Column names to select and serialize
+
+        Returns:
+            Pairs of column names and their converters
+
+        Raises:
+            HTTPException: If a field is not a serialized column of the model
+        """
+        plan = dict(cls.serializer_plan())
+        unknown = [field for field in fields if field not in plan]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "message": "Requested fields are not columns of the list.",
+                    "fields": unknown,
+                },
+            )
+        return tuple((field, plan[field]) for field in dict.fromkeys(fields))
+
+    @staticmethod
+    def row_as_dict(row: Any, plan: tuple[tuple[str, Callable[[Any], Any]], ...]) -> Dict[str, Any]:
+        """
+        Convert a Row selected in the order of a projection plan to a dictionary.
+
+        Args:
+            row: Row tuple, no ORM instance is loaded for it
+            plan: Projection plan the row was selected with
+
+        Returns:
+            Dictionary of the projected fields
+        """
+        return {
+            key: None if (value := row[index]) is None else convert(value)
+            for index, (key, convert) in enumerate(plan)
+        }
 
     def get_dict(self, exclude_list: Optional[list[InstrumentedAttribute]] = None) -> Dict[str, Any]:
         """
@@ -153,25 +303,14 @@ class CRUDModel:
             Dictionary representation of the model
             Dictionary returns only UUID fields and fields that are not in exclude_list
         """
-        return_dict: Dict[str, Any] = {}    # Handle default field selection
-        exclude_list = exclude_list or []
-        exclude_list = [exclude_arg.key for exclude_arg in exclude_list]
-
-        columns_set = set(self.columns)
-        columns_list = set([col for col in list(columns_set) if str(col)[-2:] != "id"])
-        columns_extend = set(col for col in list(columns_set) if str(col)[-5:].lower() == "uu_id")
-        columns_list = set(columns_list) | set(columns_extend)
-        columns_list = list(set(columns_list) - set(exclude_list))
-
-        for key in columns_list:
-            val = getattr(self, key)
-            correct, value_of_database = self.iterate_over_variables(val, key)
-            if correct:
-                return_dict[key] = value_of_database
-
-        return return_dict
+        excluded = frozenset(exclude_arg.key for exclude_arg in exclude_list) if exclude_list else frozenset()
+        return {
+            key: None if (value := getattr(self, key)) is None else convert(value)
+            for key, convert in self.serializer_plan(excluded)
+        }
 
     @classmethod
+    @instrumented()
     def find_or_create(
             cls, db: Session, exclude_args: Optional[list[InstrumentedAttribute]] = None, **kwargs
     ):
@@ -186,9 +325,10 @@ class CRUDModel:
         Returns:
             Existing or newly created record
         """
+        stick_to_primary(db)  # Read and write on the primary
         # Search for existing record
         query = db.query(cls).filter(
-            cls.expiry_ends > str(arrow.now()), cls.expiry_starts <= str(arrow.now()),
+            cls.expiry_ends > func.now(), cls.expiry_starts <= func.now(),
         )
         exclude_args = exclude_args or []
         exclude_args = [exclude_arg.key for exclude_arg in exclude_args]
@@ -212,6 +352,242 @@ class CRUDModel:
         cls.meta_data.created = True
         return created_record
 
+    @classmethod
+    @instrumented()
+    async def async_find_or_create(
+            cls, db: AsyncSession, exclude_args: Optional[list[InstrumentedAttribute]] = None, **kwargs
+    ):
+        """
+        Find an existing record matching the criteria or create a new one.
+
+        Args:
+            db: Async database session
+            exclude_args: Keys to exclude from search
+            **kwargs: Search/creation criteria
+
+        Returns:
+            Existing or newly created record
+        """
+        stick_to_primary(db)  # Read and write on the primary
+        # Search for existing record
+        statement = select(cls).where(
+            cls.expiry_ends > func.now(), cls.expiry_starts <= func.now(),
+        )
+        exclude_args = exclude_args or []
+        exclude_args = [exclude_arg.key for exclude_arg in exclude_args]
+        for key, value in kwargs.items():
+            if hasattr(cls, key) and key not in exclude_args:
+                statement = statement.where(getattr(cls, key) == value)
+
+        already_record = (await db.scalars(statement.limit(1))).first()
+        if already_record:  # Handle existing record
+            cls.meta_data.created = False
+            return already_record
+
+        # Create new record
+        created_record = cls()
+        for key, value in kwargs.items():
+            setattr(created_record, key, value)
+        cls.create_credentials(created_record)
+
+        db.add(created_record)
+        await db.flush()
+        cls.meta_data.created = True
+        return created_record
+
+    @classmethod
+    def bulk_values(
+            cls,
+            rows: list[Dict[str, Any]],
+            conflict_columns: Optional[list[InstrumentedAttribute]] = None,
+            exclude_args: Optional[list[InstrumentedAttribute]] = None,
+    ) -> tuple[list[Dict[str, Any]], list[str]]:
+        """
+        Prepare the rows of a bulk find or create.
+
+        Args:
+            rows: Records as dictionaries of field values
+            conflict_columns: Columns of the unique index the rows conflict on
+            exclude_args: Keys to exclude from search
+
+        Returns:
+            Column values to insert (credentials included) and the keys matching existing records
+        """
+        columns = set(cls.columns)
+        credentials = cls.credentials_values()
+        values = [
+            {**{key: value for key, value in row.items() if key in columns}, **credentials}
+            for row in rows
+        ]
+        if conflict_columns:
+            return values, [column.key for column in conflict_columns]
+        exclude_args = [exclude_arg.key for exclude_arg in exclude_args or []]
+        keys = dict.fromkeys(key for row in rows for key in row)
+        return values, [key for key in keys if key in columns and key not in exclude_args]
+
+    @classmethod
+    def bulk_insert_statement(cls, conflict_columns: Optional[list[InstrumentedAttribute]] = None):
+        """INSERT ... ON CONFLICT DO NOTHING RETURNING the model, for a list of values."""
+        index_elements = [column.key for column in conflict_columns] if conflict_columns else None
+        return insert(cls).on_conflict_do_nothing(index_elements=index_elements).returning(cls)
+
+    @classmethod
+    def bulk_select_statements(cls, keys: list[str], values: list[Dict[str, Any]], batch_size: int = 1000):
+        """
+        Select the existing records of rows which were not inserted.
+
+        Args:
+            keys: Keys matching existing records
+            values: Rows which were not inserted
+            batch_size: Rows matched per statement, keeps bound parameters under the driver limit
+
+        Returns:
+            Select statements, one per batch
+        """
+        columns = [getattr(cls, key) for key in keys]
+        for start in range(0, len(values), batch_size):
+            batch = values[start: start + batch_size]
+            if len(columns) == 1:
+                yield select(cls).where(columns[0].in_([row.get(keys[0]) for row in batch]))
+            else:
+                yield select(cls).where(
+                    tuple_(*columns).in_([tuple(row.get(key) for key in keys) for row in batch])
+                )
+
+    @classmethod
+    def column_value(cls, key: str, value: Any) -> Any:
+        """
+        Convert a given value to the python type its column is loaded as.
+
+        Args:
+            key: Attribute name of the column
+            value: Value as given, e.g. a UUID or a number as a string
+
+        Returns:
+            Value comparable to the attribute of a loaded record, as given if it can not be converted
+        """
+        if value is None:
+            return None
+        try:
+            python_type = getattr(cls, key).type.python_type
+        except (AttributeError, NotImplementedError):
+            return value
+        if isinstance(value, python_type):
+            return value
+        try:
+            if python_type is uuid.UUID:
+                return uuid.UUID(str(value))
+            if python_type is datetime.datetime and isinstance(value, str):
+                return datetime.datetime.fromisoformat(value)
+            if python_type in (int, float, Decimal, str):
+                return python_type(value)
+        except (TypeError, ValueError):
+            pass
+        return value
+
+    @classmethod
+    def conflict_key(cls, keys: list[str], get: Callable[[str], Any]) -> tuple:
+        """Values of the keys of a row (get=row.get) or a record, typed as the loaded record's."""
+        return tuple(cls.column_value(key, get(key)) for key in keys)
+
+    @classmethod
+    def bulk_results(
+            cls, keys: list[str], values: list[Dict[str, Any]], inserted: list, found: list
+    ) -> list[tuple[Any, bool]]:
+        """
+        Pair every row with its record and whether it was created.
+
+        Args:
+            keys: Keys matching existing records
+            values: Rows in input order
+            inserted: Records returned by the insert
+            found: Records selected for rows which were not inserted
+
+        Returns:
+            (record, created) per row, record is None if a row conflicted on other columns
+        """
+        created = {cls.conflict_key(keys, lambda key: getattr(record, key)): record for record in inserted}
+        records = {cls.conflict_key(keys, lambda key: getattr(record, key)): record for record in found}
+        records.update(created)
+        results, seen = [], set()
+        for row in values:
+            row_key = cls.conflict_key(keys, row.get)
+            results.append((records.get(row_key), row_key in created and row_key not in seen))
+            seen.add(row_key)
+        return results
+
+    @classmethod
+    @instrumented()
+    def bulk_find_or_create(
+            cls,
+            db: Session,
+            rows: list[Dict[str, Any]],
+            conflict_columns: Optional[list[InstrumentedAttribute]] = None,
+            exclude_args: Optional[list[InstrumentedAttribute]] = None,
+    ) -> list[tuple[Any, bool]]:
+        """
+        Find existing records matching the rows or create them, in one insert and one select.
+
+        Rows are inserted with INSERT ... ON CONFLICT DO NOTHING RETURNING, the
+        rows skipped by a conflict are then matched by their conflict_columns,
+        or by all their keys but exclude_args. Unlike find_or_create, a
+        conflicting record is found even if it is expired.
+
+        Args:
+            db: Database session
+            rows: Records as dictionaries of field values
+            conflict_columns: Columns of the unique index the rows conflict on, any unique index when not given
+            exclude_args: Keys to exclude from search
+
+        Returns:
+            (record, created) per row, in the order of the rows
+        """
+        stick_to_primary(db)  # Read and write on the primary
+        if not rows:
+            return []
+        values, keys = cls.bulk_values(rows, conflict_columns, exclude_args)
+        inserted = db.scalars(cls.bulk_insert_statement(conflict_columns), values).all()
+        inserted_keys = {cls.conflict_key(keys, lambda key: getattr(record, key)) for record in inserted}
+        missing = [row for row in values if cls.conflict_key(keys, row.get) not in inserted_keys]
+        found = []
+        for statement in cls.bulk_select_statements(keys, missing):
+            found.extend(db.scalars(statement).all())
+        return cls.bulk_results(keys, values, inserted, found)
+
+    @classmethod
+    @instrumented()
+    async def async_bulk_find_or_create(
+            cls,
+            db: AsyncSession,
+            rows: list[Dict[str, Any]],
+            conflict_columns: Optional[list[InstrumentedAttribute]] = None,
+            exclude_args: Optional[list[InstrumentedAttribute]] = None,
+    ) -> list[tuple[Any, bool]]:
+        """
+        Find existing records matching the rows or create them, in one insert and one select.
+
+        Args:
+            db: Async database session
+            rows: Records as dictionaries of field values
+            conflict_columns: Columns of the unique index the rows conflict on, any unique index when not given
+            exclude_args: Keys to exclude from search
+
+        Returns:
+            (record, created) per row, in the order of the rows
+        """
+        stick_to_primary(db)  # Read and write on the primary
+        if not rows:
+            return []
+        values, keys = cls.bulk_values(rows, conflict_columns, exclude_args)
+        inserted = (await db.scalars(cls.bulk_insert_statement(conflict_columns), values)).all()
+        inserted_keys = {cls.conflict_key(keys, lambda key: getattr(record, key)) for record in inserted}
+        missing = [row for row in values if cls.conflict_key(keys, row.get) not in inserted_keys]
+        found = []
+        for statement in cls.bulk_select_statements(keys, missing):
+            found.extend((await db.scalars(statement)).all())
+        return cls.bulk_results(keys, values, inserted, found)
+
+    @instrumented()
     def update(self, db: Session, **kwargs):
         """
         Update the record with new values.
@@ -223,6 +599,7 @@ class CRUDModel:
         Returns:
             Updated record
         """
+        stick_to_primary(db)
         for key, value in kwargs.items():
             setattr(self, key, value)
 
@@ -236,6 +613,100 @@ class CRUDModel:
             db.rollback()
         return self
 
+    @instrumented()
+    async def async_update(self, db: AsyncSession, **kwargs):
+        """
+        Update the record with new values.
+
+        Args:
+            db: Async database session
+            **kwargs: Fields to update
+
+        Returns:
+            Updated record
+        """
+        stick_to_primary(db)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+        self.update_credentials()
+        try:
+            await db.flush()
+            self.meta_data.updated = True
+        except Exception as e:
+            print('Error:', e)
+            self.meta_data.updated = False
+            await db.rollback()
+        return self
+
+    @classmethod
+    def update_statement(cls, args: tuple, values: Dict[str, Any]):
+        """
+        UPDATE ... WHERE ... RETURNING id of the not expired records matching filter expressions.
+
+        Args:
+            args: Filter expressions, as given to filter_all
+            values: Column values to set, credentials are stamped in SQL
+
+        Returns:
+            ORM enabled update statement keeping the identity map in sync
+        """
+        values = dict(values)
+        person_id = getattr(cls.creds, "person_id", None)
+        person_name = getattr(cls.creds, "person_name", None)
+        if person_id and person_name and hasattr(cls, "updated_by_id"):
+            values["updated_by_id"] = person_id
+            values["updated_by"] = person_name
+        args = cls.get_not_expired_query_arg(args)
+        return (
+            sql_update(cls)
+            .where(*args)
+            .values(values)
+            .returning(cls.id)
+            .execution_options(synchronize_session="fetch")
+        )
+
+    @classmethod
+    @instrumented()
+    def update_all(cls, *args, db: Session, values: Dict[str, Any]) -> int:
+        """
+        Update every record matching filter expressions in a single statement.
+
+        Records are not loaded, instances already in the session get the new
+        values from the primary keys returned by the statement.
+
+        Args:
+            *args: Filter expressions, as given to filter_all
+            db: Database session
+            values: Column values to set
+
+        Returns:
+            Number of updated records
+        """
+        stick_to_primary(db)
+        updated = len(db.execute(cls.update_statement(args, values)).all())
+        cls.meta_data.updated = bool(updated)
+        return updated
+
+    @classmethod
+    @instrumented()
+    async def async_update_all(cls, *args, db: AsyncSession, values: Dict[str, Any]) -> int:
+        """
+        Update every record matching filter expressions in a single statement.
+
+        Args:
+            *args: Filter expressions, as given to filter_all
+            db: Async database session
+            values: Column values to set
+
+        Returns:
+            Number of updated records
+        """
+        stick_to_primary(db)
+        updated = len((await db.execute(cls.update_statement(args, values))).all())
+        cls.meta_data.updated = bool(updated)
+        return updated
+
     def update_credentials(self) -> None:
         """
         Save user credentials for tracking.
@@ -6,15 +6,31 @@ including pagination, ordering, and complex query building.
 """
 
 from __future__ import annotations
-import arrow
 
+from datetime import datetime, timezone
 from typing import Any, TypeVar, Type, Union, Optional
 
-from sqlalchemy import ColumnExpressionArgument
-from sqlalchemy.orm import Query, Session
-from sqlalchemy.sql.elements import BinaryExpression
-
-from application.services.database.controllers.response_controllers import PostgresResponse
+from sqlalchemy import (
+    ColumnExpressionArgument,
+    PrimaryKeyConstraint,
+    Select,
+    UniqueConstraint,
+    func,
+    inspect,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, make_transient_to_detached
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, ColumnElement
+
+from application.services.database.cache import identity_cache, is_cached
+from application.services.database.metrics import instrumented
+from application.services.database.routing import STICKY_PRIMARY
+from application.services.database.controllers.response_controllers import (
+    PostgresResponse,
+    AsyncPostgresResponse,
+)
 
 
 T = TypeVar("T", bound="QueryModel")
@@ -24,21 +40,99 @@ class QueryModel:
 
     pre_query = None
     __abstract__ = True
+    # Attribute name -> True if its column leads an index, set once the mapper is configured
+    __sortable_columns__: dict[str, bool] = {}
+    # Opt in to the identity cache of filter_one, rows are cached under __cache_keys__
+    __identity_cache__: bool = False
+    __cache_keys__: tuple[str, ...] = ()
+
+    @classmethod
+    def __declare_last__(cls) -> None:
+        """Precompute the sortable columns and cache keys of the model once its mapper is configured."""
+        cls.__sortable_columns__ = cls.sortable_columns()
+        cls.__cache_keys__ = cls.unique_keys()
+
+    @classmethod
+    def unique_keys(cls: Type[T]) -> tuple[str, ...]:
+        """Attribute names of uu_id and the single column unique keys of the model."""
+        table = cls.__table__
+        unique = {
+            next(iter(index.columns))
+            for index in [*table.indexes, *table.constraints]
+            if getattr(index, "unique", False) or isinstance(index, UniqueConstraint)
+            if len(index.columns) == 1
+        }
+        return tuple(
+            attribute.key
+            for attribute in inspect(cls).column_attrs
+            if attribute.columns[0] in unique or attribute.columns[0].unique
+        )
+
+    @classmethod
+    def sortable_columns(cls: Type[T]) -> dict[str, bool]:
+        """
+        Read the column attributes of the model and which of them are indexed.
+
+        A column counts as indexed when it is the leading column of an index,
+        a unique constraint or the primary key, so an ORDER BY on it can be
+        served by an index scan.
+
+        Returns:
+            Dictionary of attribute name to indexed flag
+        """
+        table = cls.__table__
+        indexes = [
+            *table.indexes,
+            *[
+                constraint
+                for constraint in table.constraints
+                if isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint))
+            ],
+        ]
+        leading = {next(iter(index.columns)) for index in indexes if len(index.columns)}
+        return {
+            attribute.key: attribute.columns[0] in leading
+            for attribute in inspect(cls).column_attrs
+        }
 
     @classmethod
     def _query(cls: Type[T], db: Session) -> Query:
         """Returns the query to use in the model."""
         return cls.pre_query if cls.pre_query else db.query(cls)
 
+    @classmethod
+    def _select(cls: Type[T]) -> Select:
+        """Returns the select statement to use in the model with an AsyncSession."""
+        return select(cls)
+
     @classmethod
     def add_new_arg_to_args(cls: Type[T], args_list, argument, value):
-        new_arg_list = list(
-            set(
-                args_
-                for args_ in list(args_list)
-                if isinstance(args_, BinaryExpression)
-            )
-        )
+        """
+        Add a filter expression unless one on the same column is already given.
+
+        Every given expression is kept, whatever its kind: comparisons,
+        or_/and_/not_ groups and bare boolean columns alike.
+
+        Args:
+            args_list: Filter expressions of the caller
+            argument: Column name of the added expression
+            value: Expression added when no comparison on argument is given
+
+        Returns:
+            Tuple of filter expressions
+
+        Raises:
+            TypeError: If a filter is not a SQL expression, it would otherwise be lost
+        """
+        # Keep the caller's order (dropping repeated objects) so the same filters
+        # always compile to the same statement and hit the compiled cache
+        new_arg_list = {}
+        for args_ in list(args_list):
+            clause = args_.__clause_element__() if hasattr(args_, "__clause_element__") else args_
+            if not isinstance(clause, ColumnElement):
+                raise TypeError(f"Filter {args_!r} of {cls.__name__} is not a SQL expression")
+            new_arg_list.setdefault(id(args_), clause)
+        new_arg_list = list(new_arg_list.values())
         arg_left = lambda arg_obj: getattr(getattr(arg_obj, "left", None), "key", None)
         # arg_right = lambda arg_obj: getattr(getattr(arg_obj, "right", None), "value", None)
         if not any(True for arg in new_arg_list if arg_left(arg_obj=arg) == argument):
@@ -46,14 +140,102 @@ class QueryModel:
         return tuple(new_arg_list)
 
     @classmethod
-    def get_not_expired_query_arg(cls: Type[T], arg):
-        """Add expiry_starts and expiry_ends to the query."""
-        starts = cls.expiry_starts <= str(arrow.now())
-        ends = cls.expiry_ends > str(arrow.now())
+    def get_not_expired_query_arg(
+        cls: Type[T], arg, as_of: Optional[datetime] = None, live_only: bool = False
+    ):
+        """
+        Add expiry_starts and expiry_ends to the query, compared to the server side now().
+
+        With live_only, records of a CrudCollection must also be live (not
+        deleted and active), so the query matches its partial validity index.
+
+        Args:
+            arg: Filter expressions
+            as_of: Moment the records must be valid at, now() when not given
+            live_only: Add the live rows predicate of CrudCollection models
+
+        Returns:
+            Filter expressions with the validity window
+        """
+        moment = func.now() if as_of is None else as_of
+        starts = cls.expiry_starts <= moment
+        ends = cls.expiry_ends > moment
         arg = cls.add_new_arg_to_args(arg, "expiry_ends", ends)
         arg = cls.add_new_arg_to_args(arg, "expiry_starts", starts)
+        if live_only and hasattr(cls, "deleted") and hasattr(cls, "active"):
+            arg = cls.add_new_arg_to_args(arg, "deleted", cls.deleted == False)  # noqa: E712, matches the index predicate
+            arg = cls.add_new_arg_to_args(arg, "active", cls.active == True)  # noqa: E712
         return arg
 
+    @classmethod
+    def identity_cache_key(cls: Type[T], args: tuple) -> Optional[tuple[str, Any]]:
+        """
+        Read the cache key of a lookup by a single equality on a unique key.
+
+        Args:
+            args: Filter expressions given to filter_one
+
+        Returns:
+            (column, value), None if the lookup can not be served by the identity cache
+        """
+        if not is_cached(cls) or len(args) != 1:
+            return None
+        arg = args[0]
+        left, right = getattr(arg, "left", None), getattr(arg, "right", None)
+        if getattr(arg, "operator", None) is not operators.eq or not isinstance(right, BindParameter):
+            return None
+        if getattr(left, "table", None) is not cls.__table__ or left.key not in cls.__cache_keys__:
+            return None
+        return left.key, right.value
+
+    @classmethod
+    def is_valid_now(cls: Type[T], values: dict, live_only: bool = False) -> bool:
+        """Check the validity window (and live flags) of cached values as the not expired filter would."""
+        now = datetime.now(timezone.utc)
+        try:
+            if not values["expiry_starts"] <= now < values["expiry_ends"]:
+                return False
+        except (KeyError, TypeError):
+            return False
+        if not live_only:
+            return True
+        return not values.get("deleted", False) and values.get("active", True)
+
+    @classmethod
+    def cache_record(cls: Type[T], record: Any) -> None:
+        """Put the loaded column values of a record in the identity cache."""
+        state = inspect(record)
+        keys = [attribute.key for attribute in inspect(cls).column_attrs]
+        if state.identity is None or any(key not in state.dict for key in keys):
+            return
+        values = {key: state.dict[key] for key in keys}
+        identity_cache.put(cls.__name__, state.identity, values, list(cls.__cache_keys__))
+
+    @classmethod
+    def cached_record(
+        cls: Type[T], db: Any, column: str, value: Any, live_only: bool = False
+    ) -> Optional[T]:
+        """
+        Build a detached record of cached values, without querying.
+
+        Args:
+            db: Session or AsyncSession, a session which wrote reads its own writes instead
+            column: Cache key column
+            value: Cache key value
+            live_only: The record must also be live, as with filter_one(live_only=True)
+
+        Returns:
+            Detached record to merge with load=False, None on a miss
+        """
+        if db.info.get(STICKY_PRIMARY):
+            return None
+        values = identity_cache.get(cls.__name__, column, value)
+        if values is None or not cls.is_valid_now(values, live_only=live_only):
+            return None
+        record = cls(**values)
+        make_transient_to_detached(record)
+        return record
+
     @classmethod
     def produce_query_to_add(cls: Type[T], filter_list):
         """
@@ -74,6 +256,7 @@ class QueryModel:
             return tuple(cls.filter_expr(**smart_options))
 
     @classmethod
+    @instrumented()
     def filter_by_one(
         cls: Type[T], db: Session, system: bool = False, **kwargs
     ) -> PostgresResponse:
@@ -97,10 +280,13 @@ class QueryModel:
         )
 
     @classmethod
+    @instrumented()
     def filter_one(
         cls: Type[T],
         *args: Union[BinaryExpression, ColumnExpressionArgument],
         db: Session,
+        as_of: Optional[datetime] = None,
+        live_only: bool = False,
     ) -> PostgresResponse:
         """
         Filter single record by expressions.
@@ -108,17 +294,28 @@ class QueryModel:
         Args:
             db: Database session
             args: Filter expressions
+            as_of: Read the record valid at this moment instead of now
+            live_only: Only read a live record of a CrudCollection, not deleted and active
 
         Returns:
             Query response with single record
         """
-        args = cls.get_not_expired_query_arg(args)
+        cache_key = cls.identity_cache_key(args) if as_of is None else None
+        args = cls.get_not_expired_query_arg(args, as_of=as_of, live_only=live_only)
         query = cls._query(db=db).filter(*args)
-        return PostgresResponse(
+        response = PostgresResponse(
             model=cls, pre_query=cls._query(db=db), query=query, is_array=False
         )
+        if cache_key:  # Read through the identity cache
+            cached = cls.cached_record(db, *cache_key, live_only=live_only)
+            if cached is not None:
+                return response.resolve(db.merge(cached, load=False))
+            if response.data is not None:
+                cls.cache_record(response.data)
+        return response
 
     @classmethod
+    @instrumented()
     def filter_one_system(
         cls,
         *args: Union[BinaryExpression, ColumnExpressionArgument],
@@ -139,6 +336,7 @@ class QueryModel:
         )
 
     @classmethod
+    @instrumented()
     def filter_all_system(
         cls: Type[T],
         *args: Union[BinaryExpression, ColumnExpressionArgument],
@@ -162,10 +360,13 @@ class QueryModel:
         )
 
     @classmethod
+    @instrumented()
     def filter_all(
         cls: Type[T],
         *args: Union[BinaryExpression, ColumnExpressionArgument],
         db: Session,
+        as_of: Optional[datetime] = None,
+        live_only: bool = False,
     ) -> PostgresResponse:
         """
         Filter multiple records by expressions.
@@ -173,16 +374,19 @@ class QueryModel:
         Args:
             db: Database session
             args: Filter expressions
+            as_of: Read the records valid at this moment instead of now
+            live_only: Only read live records of a CrudCollection, not deleted and active
         Returns:
             Query response with matching records
         """
-        args = cls.get_not_expired_query_arg(args)
+        args = cls.get_not_expired_query_arg(args, as_of=as_of, live_only=live_only)
         query = cls._query(db).filter(*args)
         return PostgresResponse(
             model=cls, pre_query=cls._query(db), query=query, is_array=True
         )
 
     @classmethod
+    @instrumented()
     def filter_by_all_system(cls: Type[T], db: Session, **kwargs) -> PostgresResponse:
         """
         Filter multiple records by keyword arguments.
@@ -198,3 +402,151 @@ class QueryModel:
         return PostgresResponse(
             model=cls, pre_query=cls._query(db), query=query, is_array=True
         )
+
+    @classmethod
+    @instrumented()
+    async def async_filter_by_one(
+        cls: Type[T], db: AsyncSession, system: bool = False, **kwargs
+    ) -> AsyncPostgresResponse:
+        """
+        Filter single record by keyword arguments.
+
+        Args:
+            db: Async database session
+            system: If True, skip status filtering
+            **kwargs: Filter criteria
+
+        Returns:
+            Fetched query response with single record
+        """
+        if "is_confirmed" not in kwargs and not system:
+            kwargs["is_confirmed"] = True
+        kwargs.pop("system", None)
+        query = cls._select().filter_by(**kwargs)
+        return await AsyncPostgresResponse(
+            db=db, model=cls, pre_query=cls._select(), query=query, is_array=False
+        ).fetch()
+
+    @classmethod
+    @instrumented()
+    async def async_filter_one(
+        cls: Type[T],
+        *args: Union[BinaryExpression, ColumnExpressionArgument],
+        db: AsyncSession,
+        as_of: Optional[datetime] = None,
+        live_only: bool = False,
+    ) -> AsyncPostgresResponse:
+        """
+        Filter single record by expressions.
+
+        Args:
+            db: Async database session
+            args: Filter expressions
+            as_of: Read the record valid at this moment instead of now
+            live_only: Only read a live record of a CrudCollection, not deleted and active
+
+        Returns:
+            Fetched query response with single record
+        """
+        cache_key = cls.identity_cache_key(args) if as_of is None else None
+        args = cls.get_not_expired_query_arg(args, as_of=as_of, live_only=live_only)
+        query = cls._select().where(*args)
+        response = AsyncPostgresResponse(
+            db=db, model=cls, pre_query=cls._select(), query=query, is_array=False
+        )
+        if cache_key:  # Read through the identity cache
+            cached = cls.cached_record(db, *cache_key, live_only=live_only)
+            if cached is not None:
+                return response.resolve(await db.merge(cached, load=False))
+            if (await response.fetch()).data is not None:
+                cls.cache_record(response.data)
+        return await response.fetch()
+
+    @classmethod
+    @instrumented()
+    async def async_filter_one_system(
+        cls,
+        *args: Union[BinaryExpression, ColumnExpressionArgument],
+        db: AsyncSession,
+    ) -> AsyncPostgresResponse:
+        """
+        Filter single record by expressions without status filtering
+        Args:
+            *args:
+            db:
+
+        Returns:
+            Fetched query response with single record
+        """
+        query = cls._select().where(*args)
+        return await AsyncPostgresResponse(
+            db=db, model=cls, pre_query=cls._select(), query=query, is_array=False
+        ).fetch()
+
+    @classmethod
+    @instrumented()
+    async def async_filter_all_system(
+        cls: Type[T],
+        *args: Union[BinaryExpression, ColumnExpressionArgument],
+        db: AsyncSession,
+    ) -> AsyncPostgresResponse:
+        """
+        Filter multiple records by expressions without status filtering.
+
+        Args:
+            db: Async database session
+            args: Filter expressions
+
+        Returns:
+            Fetched query response with matching records
+        """
+        query = cls._select().where(*args)
+        return await AsyncPostgresResponse(
+            db=db, model=cls, pre_query=cls._select(), query=query, is_array=True
+        ).fetch()
+
+    @classmethod
+    @instrumented()
+    async def async_filter_all(
+        cls: Type[T],
+        *args: Union[BinaryExpression, ColumnExpressionArgument],
+        db: AsyncSession,
+        as_of: Optional[datetime] = None,
+        live_only: bool = False,
+    ) -> AsyncPostgresResponse:
+        """
+        Filter multiple records by expressions.
+
+        Args:
+            db: Async database session
+            args: Filter expressions
+            as_of: Read the records valid at this moment instead of now
+            live_only: Only read live records of a CrudCollection, not deleted and active
+        Returns:
+            Fetched query response with matching records
+        """
+        args = cls.get_not_expired_query_arg(args, as_of=as_of, live_only=live_only)
+        query = cls._select().where(*args)
+        return await AsyncPostgresResponse(
+            db=db, model=cls, pre_query=cls._select(), query=query, is_array=True
+        ).fetch()
+
+    @classmethod
+    @instrumented()
+    async def async_filter_by_all_system(
+        cls: Type[T], db: AsyncSession, **kwargs
+    ) -> AsyncPostgresResponse:
+        """
+        Filter multiple records by keyword arguments.
+
+        Args:
+            db: Async database session
+            **kwargs: Filter criteria
+
+        Returns:
+            Fetched query response with matching records
+        """
+        query = cls._select().filter_by(**kwargs)
+        return await AsyncPostgresResponse(
+            db=db, model=cls, pre_query=cls._select(), query=query, is_array=True
+        ).fetch()
@@ -4,12 +4,13 @@ from sqlalchemy import (
     func,
     text,
     UUID,
+    Index,
     String,
     Integer,
     Boolean,
     SmallInteger,
 )
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column
 from sqlalchemy_mixins.serialize import SerializeMixin
 from sqlalchemy_mixins.repr import ReprMixin
 from sqlalchemy_mixins.smartquery import SmartQueryMixin
@@ -20,6 +21,31 @@ from application.services.database.controllers.filter_controllers import QueryMo
 from application.services.database.database import Base
 
 
+# Rows of a CrudCollection which are neither soft deleted nor deactivated
+LIVE_ROWS = "deleted = false AND active = true"
+
+
+def validity_index(tablename: str, live: bool = False) -> Index:
+    """
+    Index of the validity window compared by every not expired filter.
+
+    Args:
+        tablename: Table of the model
+        live: Index only the live rows of a CrudCollection, read with live_only=True
+
+    Returns:
+        Composite index of (expiry_starts, expiry_ends)
+    """
+    if live:
+        return Index(
+            f"ix_{tablename}_live_validity",
+            "expiry_starts",
+            "expiry_ends",
+            postgresql_where=text(LIVE_ROWS),
+        )
+    return Index(f"ix_{tablename}_validity", "expiry_starts", "expiry_ends")
+
+
 class BasicMixin(
     Base,
     BaseAlchemyModel,
@@ -32,6 +58,8 @@ class BasicMixin(
 
     __abstract__ = True
     __repr__ = ReprMixin.__repr__
+    # Fetch server defaults with RETURNING on flush, AsyncSession can not lazy load them later
+    __mapper_args__ = {"eager_defaults": True}
 
 
 class CrudMixin(BasicMixin):
@@ -72,6 +100,10 @@ class CrudMixin(BasicMixin):
         comment="Record validity end timestamp",
     )
 
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:
+        return (validity_index(cls.__tablename__),)
+
 
 class CrudCollection(CrudMixin):
     """
@@ -89,6 +121,14 @@ class CrudCollection(CrudMixin):
     __abstract__ = True
     __repr__ = ReprMixin.__repr__
 
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:
+        # Reads with live_only=True match the partial index, every other read the full one
+        return (
+            validity_index(cls.__tablename__),
+            validity_index(cls.__tablename__, live=True),
+        )
+
     ref_id: Mapped[str] = mapped_column(
         String(100), nullable=True, index=True, comment="External reference ID"
     )
@@ -1,7 +1,17 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional, Union
-from sqlalchemy import desc, asc
+
+import hmac
+import json
+import uuid
+import base64
+import hashlib
+import datetime
+
+from decimal import Decimal
+from typing import Any, Dict, Literal, Optional, Union
+from sqlalchemy import desc, asc, false, func, and_, or_, tuple_
 from pydantic import BaseModel
+from fastapi.exceptions import HTTPException
 
 from application.validations.request.list_options.list_options import ListOptions
 from application.services.database.controllers.response_controllers import PostgresResponse
@@ -17,12 +27,22 @@ class PaginationConfig(BaseModel):
         size: Items per page (default: 10)
         order_field: Field to order by (default: "id")
         order_type: Order direction (default: "asc")
+        count_mode: How totals are counted (default: keep the current mode, "exact")
+            exact: separate count queries
+            window: count(*) OVER () in the page query itself
+            estimated: planner estimates, for very large tables
+            none: totals are not counted
+        cursor: Signed keyset cursor, replaces page when given
+        fields: Columns to select, whole records are loaded when not given
     """
 
     page: int = 1
     size: int = 10
     order_field: Optional[Union[tuple[str], list[str]]] = None
     order_type: Optional[Union[tuple[str], list[str]]] = None
+    count_mode: Optional[Literal["exact", "window", "estimated", "none"]] = None
+    cursor: Optional[str] = None
+    fields: Optional[list[str]] = None
 
     def __init__(self, **data):
         super().__init__(**data)
@@ -49,17 +69,24 @@ class Pagination:
     MIN_SIZE: int = int(api_configs.MIN_SIZE or 5)
     MAX_SIZE: int = int(api_configs.MAX_SIZE or 50)
 
-    def __init__(self, data: PostgresResponse):
+    def __init__(self, data: PostgresResponse, count_mode: str = "exact"):
         self._data = data
         self.size: int = self.DEFAULT_SIZE
         self.page: int = 1
         self.orderField: Optional[Union[tuple[str], list[str]]] = ["uu_id"]
         self.orderType: Optional[Union[tuple[str], list[str]]] = ["asc"]
+        self.count_mode: str = count_mode
+        self.window_total: Optional[int] = None
+        self.cursor: Optional[str] = None
+        self.next_cursor: Optional[str] = None
+        self.prev_cursor: Optional[str] = None
+        self.unindexed_order: list[str] = []
+        self.fields: Optional[list[str]] = None
         self.page_count: int = 1
         self.total_count: int = 0
         self.all_count: int = 0
         self.total_pages: int = 1
-        self._update_page_counts()
+        # Nothing is counted yet, change() or as_dict() counts in the requested count_mode
 
     @property
     def data(self) -> Union[list, dict]:
@@ -76,24 +103,57 @@ class Pagination:
         self.page = config.page
         self.orderField = config.order_field
         self.orderType = config.order_type
+        self.count_mode = config.count_mode or self.count_mode
+        self.cursor = config.cursor
+        self.fields = config.fields
         self._update_page_counts()
 
     def feed(self, data: PostgresResponse) -> None:
         """Calculate pagination based on data source."""
         self._data = data
+        self.window_total = None
+        self._update_page_counts()
+
+    def feed_window_total(self, total: Optional[int]) -> None:
+        """
+        Calculate pagination from the count(*) OVER () column of a fetched page.
+
+        Args:
+            total: Window total of the first row, None if the page was empty
+        """
+        if total is None:  # Empty page, only an empty first page proves there are no rows
+            total = 0 if self.page == 1 else self._data.filtered_count
+        self.window_total = total
         self._update_page_counts()
 
+    @property
+    def counted(self) -> bool:
+        """Check if totals are known, the current page can be validated only then."""
+        if self.count_mode == "none":
+            return False
+        return self.count_mode != "window" or self.window_total is not None
+
     def _update_page_counts(self) -> None:
         """Update page counts and validate current page."""
-        if self.data:
-            self.total_count = self._data.count
+        if self.count_mode == "exact":
+            self.total_count = self._data.filtered_count
             self.all_count = self._data.total_count
+        elif self.count_mode == "estimated":
+            self.total_count = self._data.estimated_count
+            self.all_count = self._data.estimated_total_count
+        elif self.count_mode == "window" and self.window_total is not None:
+            self.total_count = self.window_total
+            self.all_count = self._data.estimated_total_count
 
         self.size = (
             self.size
             if self.MIN_SIZE <= self.size <= self.MAX_SIZE
             else self.DEFAULT_SIZE
         )
+        if not self.counted:
+            self.page = max(1, self.page)
+            self.page_count = self.size
+            return
         self.total_pages = max(1, (self.total_count + self.size - 1) // self.size)
         self.page = max(1, min(self.page, self.total_pages))
         self.page_count = (
@@ -125,9 +185,90 @@ class Pagination:
             "pageCount": self.page_count,
             "orderField": self.orderField,
             "orderType": self.orderType,
+            "countMode": self.count_mode,
+            "nextCursor": self.next_cursor,
+            "prevCursor": self.prev_cursor,
+            "unindexedOrder": self.unindexed_order,
+            "fields": self.fields,
         }
 
 
+class KeysetCursor:
+    """
+    Opaque position of a row in an ordered list, for keyset pagination.
+
+    The cursor carries the direction, the order criteria and the sort values
+    of the boundary row, signed with the API secret so it can not be forged.
+    """
+
+    @staticmethod
+    def _sign(payload: bytes) -> str:
+        secret = str(api_configs.SECRET).encode("utf-8")
+        return hmac.new(secret, payload, hashlib.sha256).hexdigest()[:32]
+
+    @classmethod
+    def encode(cls, direction: str, order: list[list[str]], values: list[Any]) -> str:
+        """
+        Create a cursor.
+
+        Args:
+            direction: "next" for rows after the position, "prev" for rows before it
+            order: [field, "asc" | "desc"] pairs the values belong to
+            values: Sort values of the boundary row
+
+        Returns:
+            Signed cursor string
+        """
+        body = json.dumps({"d": direction, "o": order, "v": values}, default=str, separators=(",", ":"))
+        payload = base64.urlsafe_b64encode(body.encode("utf-8")).rstrip(b"=")
+        return f"{payload.decode()}.{cls._sign(payload)}"
+
+    @classmethod
+    def decode(cls, cursor: str) -> Dict[str, Any]:
+        """
+        Verify and read a cursor.
+
+        Args:
+            cursor: Signed cursor string
+
+        Returns:
+            Dictionary of direction "d", order "o" and values "v"
+
+        Raises:
+            HTTPException: If the cursor is malformed or its signature is wrong
+        """
+        try:
+            payload, signature = cursor.rsplit(".", 1)
+            if not hmac.compare_digest(signature, cls._sign(payload.encode())):
+                raise ValueError("signature mismatch")
+            body = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            return json.loads(body)
+        except Exception:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "message": "Invalid pagination cursor.",
+                },
+            )
+
+    @staticmethod
+    def coerce(column, value: Any) -> Any:
+        """Convert a cursor value back to the python type of its column."""
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        if value is None:
+            return None
+        if python_type is datetime.datetime:
+            return datetime.datetime.fromisoformat(value)
+        if python_type is uuid.UUID:
+            return uuid.UUID(value)
+        if python_type is Decimal:
+            return Decimal(value)
+        return value
+
+
 class PaginationResult:
     """
     Result of a paginated query.
@@ -155,53 +296,230 @@ class PaginationResult:
         self.order_type = self.pagination.orderType
         self.response_model = response_model
 
-    def dynamic_order_by(self):
+    def order_criteria(self) -> list[tuple[Any, str, bool]]:
         """
-        Dynamically order a query by multiple fields.
+        Validate the requested order against the sortable columns of the model.
+
+        Uses the column metadata precomputed at mapper configuration, the
+        database is not queried. Unknown fields are rejected, unindexed ones
+        are rejected, flagged on the pagination or allowed by UNINDEXED_SORT.
+
         Returns:
-            Ordered query object.
+            List of (column, field, is_descending)
+
+        Raises:
+            HTTPException: If a field can not be sorted on
         """
         if not len(self.order_by) == len(self.order_type):
             raise ValueError(
                 "Order by fields and order types must have the same length."
             )
-        order_criteria = zip(self.order_by, self.order_type)
-        print('order_criteria', order_criteria)
-        if not self._data.data:
-            return self._core_query
-
-        for field, direction in order_criteria:
-            print('field', field, direction)
-            columns = self._data.data[0].filterable_attributes
-            print('columns', columns)
-            if field in columns:
-                if direction.lower().startswith("d"):
-                    self._core_query = self._core_query.order_by(
-                        desc(
-                            getattr(self._core_query.column_descriptions[0]["entity"], field)
-                        )
-                    )
-                else:
-                    self._core_query = self._core_query.order_by(
-                        asc(
-                            getattr(self._core_query.column_descriptions[0]["entity"], field)
-                        )
-                    )
-        return self._core_query
+        entity = self._core_query.column_descriptions[0]["entity"]
+        sortable = entity.__sortable_columns__
+        unknown = [field for field in self.order_by if field not in sortable]
+        unindexed = [field for field in self.order_by if field in sortable and not sortable[field]]
+        if unknown or (unindexed and api_configs.UNINDEXED_SORT == "reject"):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "message": "List can not be ordered by the given fields.",
+                    "unknown": unknown,
+                    "unindexed": unindexed if api_configs.UNINDEXED_SORT == "reject" else [],
+                },
+            )
+        if api_configs.UNINDEXED_SORT == "flag":
+            self.pagination.unindexed_order = unindexed
+        return [
+            (getattr(entity, field), field, direction.lower().startswith("d"))
+            for field, direction in zip(self.order_by, self.order_type)
+        ]
+
+    def dynamic_order_by(self):
+        """
+        Dynamically order a query by multiple fields.
+        Returns:
+            Ordered query object.
+        """
+        return self._core_query.order_by(
+            *[desc(column) if is_desc else asc(column) for column, _, is_desc in self.order_criteria()]
+        )
+
+    def keyset_criteria(self) -> list[tuple[Any, str, bool]]:
+        """
+        Order criteria of keyset pagination, uu_id is appended as the tiebreaker.
+
+        Returns:
+            List of (column, field, is_descending)
+        """
+        criteria = self.order_criteria()
+        if "uu_id" not in [field for _, field, _ in criteria]:
+            entity = self._core_query.column_descriptions[0]["entity"]
+            criteria.append((getattr(entity, "uu_id"), "uu_id", False))
+        return criteria
+
+    @staticmethod
+    def keyset_order(column, is_desc: bool):
+        """
+        Order clause of a keyset criterion, NULLs sort as the greatest value.
+
+        This is the default of PostgreSQL, made explicit so keyset_predicate
+        and every other database agree on where the NULLs are.
+        """
+        return desc(column).nulls_first() if is_desc else asc(column).nulls_last()
+
+    @staticmethod
+    def keyset_predicate(criteria: list[tuple[Any, str, bool]], values: list[Any], after: bool):
+        """
+        Filter rows after (or before) a position in the order of the criteria.
+
+        NULLs sort after every value in ascending order, as keyset_order
+        orders them, so nullable columns are compared with explicit IS NULL
+        and IS NOT NULL branches.
+
+        Args:
+            criteria: List of (column, field, is_descending)
+            values: Sort values of the position
+            after: True for rows after the position, False for rows before it
+
+        Returns:
+            Filter expression, a row value comparison when all directions
+            match and no column is nullable
+        """
+        directions = {is_desc for _, _, is_desc in criteria}
+        nullable = any(getattr(column.expression, "nullable", True) for column, _, _ in criteria)
+        if len(directions) == 1 and not nullable:
+            greater = (not directions.pop()) == after
+            left = tuple_(*[column for column, _, _ in criteria])
+            right = tuple_(*values)
+            return left > right if greater else left < right
+
+        def equal(column, value):
+            return column.is_(None) if value is None else column == value
+
+        def beyond(column, value, greater: bool):
+            if greater:  # Only NULLs are greater than a value, nothing is greater than NULL
+                return false() if value is None else or_(column > value, column.is_(None))
+            return column.is_not(None) if value is None else column < value
+
+        clauses = []
+        for index, (column, _, is_desc) in enumerate(criteria):
+            equals = [equal(criteria[i][0], values[i]) for i in range(index)]
+            clauses.append(and_(*equals, beyond(column, values[index], (not is_desc) == after)))
+        return or_(*clauses)
+
+    def projection(self) -> Optional[tuple]:
+        """Projection plan of the requested fields, None to load whole records."""
+        if not self.pagination.fields:
+            return None
+        entity = self._core_query.column_descriptions[0]["entity"]
+        return entity.projection_plan(self.pagination.fields)
+
+    def project(self, query, plan: tuple, extra: list[str]):
+        """
+        Select only the projected columns, plus the extra ones the page needs.
+
+        Args:
+            query: Query of the list
+            plan: Projection plan, its columns are selected first in plan order
+            extra: Further column names, e.g. order fields for the cursors
+
+        Returns:
+            Query returning Row tuples instead of ORM instances
+        """
+        entity = self._core_query.column_descriptions[0]["entity"]
+        selected = [key for key, _ in plan]
+        selected += [field for field in extra if field not in selected]
+        return query.with_entities(*[getattr(entity, key) for key in selected])
+
+    def keyset_page(self, plan: Optional[tuple] = None) -> list:
+        """
+        Fetch the page of a list query and set the cursors of the pagination.
+
+        Without a cursor the page is read with offset, with a cursor the rows
+        after (or before) its position are read on an index range, with no
+        offset, so deep pages cost the same as the first one.
+
+        Args:
+            plan: Projection plan, rows are selected instead of records when given
+
+        Returns:
+            Records (or rows) of the page
+        """
+        criteria = self.keyset_criteria()
+        order = [[field, "desc" if is_desc else "asc"] for _, field, is_desc in criteria]
+        query, backwards, position = self._core_query, False, None
+        if plan:
+            query = self.project(query, plan, [field for _, field, _ in criteria])
+        if self.pagination.cursor:
+            decoded = KeysetCursor.decode(self.pagination.cursor)
+            if decoded.get("o") != order:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "message": "Pagination cursor does not match the order of the list.",
+                    },
+                )
+            backwards = decoded.get("d") == "prev"
+            position = [
+                KeysetCursor.coerce(column, value)
+                for (column, _, _), value in zip(criteria, decoded.get("v", []))
+            ]
+            query = query.filter(self.keyset_predicate(criteria, position, after=not backwards))
+
+        query = query.order_by(
+            *[self.keyset_order(column, is_desc != backwards) for column, _, is_desc in criteria]
+        )
+        query = query.limit(self.limit + 1)  # One more row tells if there is a further page
+        window = self.pagination.count_mode == "window" and position is None
+        if position is None:
+            query = query.offset(self.offset)
+        if window:  # Filtered total counted in the same round trip as the page
+            rows = query.add_columns(func.count().over().label("window_total")).all()
+            records = rows if plan else [row[0] for row in rows]
+            self.pagination.feed_window_total(rows[0][-1] if rows else None)
+        else:
+            records = query.all()
+            if self.pagination.count_mode == "window":  # A window after a cursor only sees the rest
+                self.pagination.feed_window_total(self._data.filtered_count)
+
+        has_more = len(records) > self.limit
+        records = records[: self.limit]
+        if backwards:
+            records.reverse()
+
+        def cursor_of(direction: str, record) -> str:
+            return KeysetCursor.encode(direction, order, [getattr(record, field) for _, field, _ in criteria])
+
+        has_next = has_more if not backwards else True
+        has_prev = has_more if backwards else (position is not None or self.offset > 0)
+        self.pagination.next_cursor = cursor_of("next", records[-1]) if records and has_next else None
+        self.pagination.prev_cursor = cursor_of("prev", records[0]) if records and has_prev else None
+        return records
 
     @property
     def data(self) -> Union[list | dict]:
         """Get query object."""
-        query_ordered = self.dynamic_order_by()
-        query_paginated = query_ordered.limit(self.limit).offset(self.offset)
-        queried_data = (
-            query_paginated.all() if self.response_type else query_paginated.first()
-        )
-        data = (
-            [result.get_dict() for result in queried_data]
-            if self.response_type
-            else queried_data.get_dict()
-        )
+        plan = self.projection()
+        if self.response_type:
+            queried_data = self.keyset_page(plan)
+        else:
+            query_ordered = self.dynamic_order_by()
+            if plan:
+                query_ordered = self.project(query_ordered, plan, [])
+            queried_data = query_ordered.limit(self.limit).offset(self.offset).first()
+        if plan:  # Rows are serialized straight from their tuples
+            row_as_dict = self._core_query.column_descriptions[0]["entity"].row_as_dict
+            data = (
+                [row_as_dict(row, plan) for row in queried_data]
+                if self.response_type
+                else row_as_dict(queried_data, plan)
+            )
+        else:
+            data = (
+                [result.get_dict() for result in queried_data]
+                if self.response_type
+                else queried_data.get_dict()
+            )
         if self.response_model:
             return [self.response_model(**item).model_dump() for item in data]
         return data
@@ -5,22 +5,36 @@ This module provides a wrapper class for SQLAlchemy query results,
 adding convenience methods for accessing data and managing query state.
 """
 
-from typing import Any, Dict, Optional, TypeVar, Generic, Union
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, TypeVar, Generic, Union
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Query
 
+from application.services.database.metrics import labelled, query_source
+
 
 T = TypeVar("T")
 
 
 class PostgresResponse(Generic[T]):
     """
-    Wrapper for PostgreSQL/SQLAlchemy query results.
+    Lazy, memoizing wrapper for PostgreSQL/SQLAlchemy query results.
+
+    The query runs at most once, on the first access of a result property or
+    an explicit `fetch`, and `invalidate` forgets the results so the next
+    access runs it again. Large results can be iterated with `stream` without
+    loading them at once.
 
     Attributes:
         metadata: Additional metadata for the query
 
     Properties:
-        count: Total count of results
+        count: Count of results
+        filtered_count: Count of results by a count query, rows are not loaded
+        estimated_count: Planner estimate of the count of results
+        total_count: Total count of the unfiltered query
+        estimated_total_count: Planner estimate of the unfiltered table rows
+        validator: Count and latest update of the filtered rows, for conditional requests
         query: Get query object
         as_dict: Convert response to dictionary format
     """
@@ -37,8 +51,61 @@ class PostgresResponse(Generic[T]):
         self._is_list = is_array
         self._query = query
         self._pre_query = pre_query
-        self._count: Optional[int] = None
+        self._fetched: bool = False
+        self._data: Union[T, list[T], None] = None
+        self._total_count: Optional[int] = None
+        self._filtered_count: Optional[int] = None
+        self._estimated_count: Optional[int] = None
+        self._estimated_total_count: Optional[int] = None
         self.metadata = metadata
+        # Statements run lazily, label them with the mixin method that built the query
+        self._source = query_source.get() or (model.__name__, "PostgresResponse.data")
+
+    def fetch(self) -> "PostgresResponse[T]":
+        """Execute the query unless its results are already loaded."""
+        if self._fetched:
+            return self
+        with labelled(*self._source):
+            if self.is_list:
+                self._data = self._query.all()
+            else:
+                self._data = self._query.first()
+        self._fetched = True
+        return self
+
+    def resolve(self, data: Union[T, list[T], None]) -> "PostgresResponse[T]":
+        """Use already known results, e.g. from a cache, instead of executing the query."""
+        self._data = data
+        self._fetched = True
+        return self
+
+    def invalidate(self) -> None:
+        """Forget loaded results, the next access executes the query again."""
+        self._fetched = False
+        self._data = None
+        self._total_count = None
+        self._filtered_count = None
+        self._estimated_count = None
+        self._estimated_total_count = None
+
+    def stream(self, batch_size: int = 1000) -> Iterator[T]:
+        """
+        Iterate over results without loading all of them at once.
+
+        Args:
+            batch_size: Rows fetched from the cursor per round trip
+
+        Yields:
+            Query results, from memory if they are already loaded
+        """
+        if self._fetched:
+            yield from self._data if self.is_list else ([self._data] if self._data else [])
+            return
+        if not self.is_list:
+            yield from ([self.data] if self.data else [])
+            return
+        with labelled(*self._source):
+            yield from self._query.yield_per(batch_size)
 
     @property
     def core_class(self):
@@ -48,32 +115,258 @@ class PostgresResponse(Generic[T]):
     @property
     def data(self) -> Union[T, list[T]]:
         """Get query results."""
+        self.fetch()
         if not self.is_list:
-            first_item = self._query.first()
-            return first_item if first_item else None
-        return self._query.all() if self._query.all() else []
+            return self._data if self._data else None
+        return self._data if self._data else []
 
     @property
     def data_as_dict(self) -> Union[Dict[str, Any], list[Dict[str, Any]]]:
         """Get query results as dictionary."""
-        if self.is_list:
-            first_item = self._query.first()
-            return first_item.get_dict() if first_item.first() else None
-        all_items = self._query.all()
-        return [result.get_dict() for result in all_items] if all_items else []
+        if not self.is_list:
+            return self.data.get_dict() if self.data else None
+        return [result.get_dict() for result in self.data]
 
     @property
     def total_count(self) -> int:
         """Lazy load and return total count of results."""
+        if self._total_count is not None:
+            return self._total_count
         if self.is_list:
-            return self._pre_query.count() if self._pre_query else 0
-        if self.data:
+            with labelled(self._source[0], "PostgresResponse.total_count"):
+                self._total_count = self._pre_query.count() if self._pre_query else 0
+        else:
+            self._total_count = 1 if self.data else 0
+        return self._total_count
+
+    @property
+    def filtered_count(self) -> int:
+        """Count results with a count query unless they are already loaded."""
+        if not self.is_list:
+            return self.count
+        if self._filtered_count is None:
+            if self._fetched:
+                self._filtered_count = len(self._data)
+            else:
+                with labelled(self._source[0], "PostgresResponse.filtered_count"):
+                    self._filtered_count = self._query.order_by(None).count()
+        return self._filtered_count
+
+    @property
+    def estimated_count(self) -> int:
+        """Planner row estimate of the query, exact count if it can not be explained."""
+        if not self.is_list:
+            return self.count
+        if self._estimated_count is None:
+            try:
+                session = self._query.session
+                statement = self._query.order_by(None).statement.compile(
+                    dialect=session.get_bind().dialect,
+                    compile_kwargs={"literal_binds": True},
+                )
+                escaped = str(statement).replace(":", "\\:")  # Literal colons, not binds
+                with labelled(self._source[0], "PostgresResponse.estimated_count"):
+                    with session.begin_nested():  # A failing EXPLAIN must not abort the transaction
+                        plan = session.execute(
+                            text(f"EXPLAIN (FORMAT JSON) {escaped}").execution_options(read_only=True)
+                        ).scalar()
+                self._estimated_count = int(plan[0]["Plan"]["Plan Rows"])
+            except Exception as e:
+                print(f"Error @Estimated count: {e}")
+                self._estimated_count = self.filtered_count
+        return self._estimated_count
+
+    @property
+    def estimated_total_count(self) -> int:
+        """Row estimate of the model table from pg_class, exact count if never analyzed."""
+        if self._estimated_total_count is None:
+            try:
+                with labelled(self._source[0], "PostgresResponse.estimated_total_count"):
+                    reltuples = self._query.session.execute(
+                        text(
+                            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"
+                        ).execution_options(read_only=True),
+                        {"table": self._core_class.__table__.fullname},
+                    ).scalar()
+            except Exception as e:
+                print(f"Error @Estimated total count: {e}")
+                reltuples = None
+            if reltuples is None or reltuples < 0:  # Table was never analyzed
+                reltuples = self.total_count
+            self._estimated_total_count = int(reltuples)
+        return self._estimated_total_count
+
+    @property
+    def validator(self) -> Optional[str]:
+        """
+        Cheap validator of the filtered rows: their count and latest updated_at.
+
+        Read in one aggregate over the filter, without loading rows, so a
+        conditional request can be answered before the page is queried. Any
+        insert, update, soft or hard delete of a matching row changes it.
+
+        Returns:
+            "count:max(updated_at)", None if the model has no updated_at column
+        """
+        updated_at = self._core_class.__table__.c.get("updated_at")
+        if updated_at is None:
+            return None
+        subquery = self._query.order_by(None).with_entities(updated_at.label("updated_at")).subquery()
+        with labelled(self._source[0], "PostgresResponse.validator"):
+            row = self._query.session.execute(select(func.count(), func.max(subquery.c.updated_at))).one()
+        return f"{row[0]}:{row[1].isoformat() if row[1] is not None else ''}"
+
+    @property
+    def count(self) -> int:
+        """Lazy load and return count of results."""
+        data = self.data
+        if data and not isinstance(data, list):
             return 1
+        elif data and isinstance(data, list):
+            return len(data)
         return 0
 
+    @property
+    def query(self) -> str:
+        """Get query object."""
+        return str(self._query)
+
+    @property
+    def core_query(self) -> Query:
+        """Get query object."""
+        return self._query
+
+    @property
+    def is_list(self) -> bool:
+        """Check if response is a list."""
+        return self._is_list
+
+    @property
+    def as_dict(self) -> Dict[str, Any]:
+        """Convert response to dictionary format."""
+        data = self.data
+        if isinstance(data, list):
+            return {
+                "metadata": self.metadata,
+                "is_list": self._is_list,
+                "query": str(self.query),
+                "count": self.count,
+                "data": [result.get_dict() for result in data],
+            }
+        return {
+            "metadata": self.metadata,
+            "is_list": self._is_list,
+            "query": str(self.query),
+            "count": self.count,
+            "data": data.get_dict() if data else {},
+        }
+
+
+class AsyncPostgresResponse(Generic[T]):
+    """
+    Wrapper for PostgreSQL/SQLAlchemy select results executed on an AsyncSession.
+
+    AsyncSession has no lazy Query object, so the statement is awaited once in
+    `fetch` and every property afterward reads the loaded rows. `invalidate`
+    forgets them until the next `fetch`, `stream` iterates without loading
+    them at once.
+
+    Properties:
+        count: Count of loaded results
+        query: Get query string
+        as_dict: Convert response to dictionary format
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        pre_query: Select,
+        query: Select,
+        model,
+        is_array: bool = True,
+        metadata: Any = None,
+    ):
+        self._db = db
+        self._core_class = model
+        self._is_list = is_array
+        self._query = query
+        self._pre_query = pre_query
+        self._fetched: bool = False
+        self._data: Union[T, list[T], None] = None
+        self._total_count: Optional[int] = None
+        self.metadata = metadata
+
+    async def fetch(self) -> "AsyncPostgresResponse[T]":
+        """Execute the statement unless its results are already loaded."""
+        if self._fetched:
+            return self
+        if self.is_list:
+            self._data = list((await self._db.scalars(self._query)).all())
+        else:
+            self._data = (await self._db.scalars(self._query.limit(1))).first()
+        self._fetched = True
+        return self
+
+    def resolve(self, data: Union[T, list[T], None]) -> "AsyncPostgresResponse[T]":
+        """Use already known results, e.g. from a cache, instead of awaiting the statement."""
+        self._data = data
+        self._fetched = True
+        return self
+
+    def invalidate(self) -> None:
+        """Forget loaded results, the next fetch executes the statement again."""
+        self._fetched = False
+        self._data = None
+        self._total_count = None
+
+    async def stream(self, batch_size: int = 1000) -> AsyncIterator[T]:
+        """
+        Iterate over results without loading all of them at once.
+
+        Args:
+            batch_size: Rows fetched from the server side cursor per round trip
+
+        Yields:
+            Query results, from memory if they are already loaded
+        """
+        if self._fetched or not self.is_list:
+            await self.fetch()
+            for item in self._data if self.is_list else ([self._data] if self._data else []):
+                yield item
+            return
+        query = self._query.execution_options(yield_per=batch_size)
+        async for item in await self._db.stream_scalars(query):
+            yield item
+
+    async def fetch_total_count(self) -> int:
+        """Execute and return total count of the unfiltered statement."""
+        if self._total_count is not None:
+            return self._total_count
+        if not self.is_list:
+            self._total_count = 1 if self._data else 0
+        elif self._pre_query is None:
+            self._total_count = 0
+        else:
+            count_query = select(func.count()).select_from(self._pre_query.subquery())
+            with labelled(self._core_class.__name__, "AsyncPostgresResponse.total_count"):
+                self._total_count = int(await self._db.scalar(count_query) or 0)
+        return self._total_count
+
+    @property
+    def core_class(self):
+        """Get query object."""
+        return self._core_class
+
+    @property
+    def data(self) -> Union[T, list[T]]:
+        """Get fetched results."""
+        if not self.is_list:
+            return self._data if self._data else None
+        return self._data if self._data else []
+
     @property
     def count(self) -> int:
-        """Lazy load and return total count of results."""
+        """Return count of fetched results."""
         if self.data and not isinstance(self.data, list):
             return 1
         elif self.data and isinstance(self.data, list):
@@ -82,12 +375,12 @@ class PostgresResponse(Generic[T]):
 
     @property
     def query(self) -> str:
-        """Get query object."""
+        """Get query string."""
         return str(self._query)
 
     @property
-    def core_query(self) -> Query:
-        """Get query object."""
+    def core_query(self) -> Select:
+        """Get select statement."""
         return self._query
 
     @property
@@ -1,16 +1,25 @@
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
 from functools import lru_cache
-from typing import Generator
+from typing import Generator, AsyncGenerator, Optional
 
 from application.db_config import postgres_configs
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker, scoped_session, Session
 
+from application.services.database.metrics import (
+    TimedQueuePool,
+    TimedAsyncAdaptedQueuePool,
+    instrument_engine,
+    instrument_queries,
+)
+from application.services.database.routing import EngineRegistry, RoutingSession
 
-# Configure the database engine with proper pooling
-engine = create_engine(
-    postgres_configs.url,
+
+# Pool settings shared by the primary and replica engines
+engine_options = dict(
     pool_pre_ping=True,  # Verify connection before using
     pool_size=20,  # Maximum number of permanent connections
     max_overflow=10,  # Maximum number of additional connections
@@ -19,15 +28,86 @@ engine = create_engine(
     echo=False,  # Set to True for debugging SQL queries
 )
 
+# Configure the database engine with proper pooling
+engine = create_engine(postgres_configs.url, poolclass=TimedQueuePool, **engine_options)
+
+# Async engine sharing the same pool settings, used by the awaitable model methods
+async_engine = create_async_engine(
+    postgres_configs.async_url, poolclass=TimedAsyncAdaptedQueuePool, **engine_options
+)
+
+# Primary and replica engines, reads of the sessions below are routed to replicas
+engine_registry = EngineRegistry(
+    primary=engine,
+    replicas=[
+        create_engine(url, poolclass=TimedQueuePool, **engine_options)
+        for url in postgres_configs.replica_urls
+    ],
+    strategy=postgres_configs.REPLICA_STRATEGY,
+    max_lag=postgres_configs.REPLICA_MAX_LAG,
+    lag_check_interval=postgres_configs.REPLICA_LAG_CHECK_INTERVAL,
+)
+async_engine_registry = EngineRegistry(
+    primary=async_engine.sync_engine,
+    replicas=[
+        create_async_engine(url, poolclass=TimedAsyncAdaptedQueuePool, **engine_options).sync_engine
+        for url in postgres_configs.async_replica_urls
+    ],
+    strategy=postgres_configs.REPLICA_STRATEGY,
+    max_lag=postgres_configs.REPLICA_MAX_LAG,
+    lag_check_interval=postgres_configs.REPLICA_LAG_CHECK_INTERVAL,
+)
+
+# Export pool and statement telemetry of every engine on /metrics
+instrumented_engines = [
+    ("primary", engine_registry.primary),
+    ("async_primary", async_engine_registry.primary),
+    *[(f"replica_{i}", replica) for i, replica in enumerate(engine_registry.replicas)],
+    *[(f"async_replica_{i}", replica) for i, replica in enumerate(async_engine_registry.replicas)],
+]
+for engine_name, instrumented_engine in instrumented_engines:
+    instrument_engine(instrumented_engine, engine_name, pool_recycle=engine_options["pool_recycle"])
+    instrument_queries(
+        instrumented_engine,
+        slow_query_threshold=postgres_configs.SLOW_QUERY_THRESHOLD,
+        explain_rate=postgres_configs.SLOW_QUERY_EXPLAIN_RATE,
+    )
+
 Base = declarative_base()
 
 
+class CheckoutCounter:
+    """Counts pool checkouts made while serving a single request."""
+
+    def __init__(self):
+        self.count = 0
+
+
+# Counter of the request being served, set by the checkout counter middleware
+request_checkouts: ContextVar[Optional[CheckoutCounter]] = ContextVar(
+    "request_checkouts", default=None
+)
+
+
+def count_request_checkout(dbapi_connection, connection_record, connection_proxy):
+    """Add every pool checkout to the counter of the current request."""
+    counter = request_checkouts.get()
+    if counter is not None:
+        counter.count += 1
+
+
+for registered_engine in engine_registry.engines + async_engine_registry.engines:
+    event.listen(registered_engine, "checkout", count_request_checkout)
+
+
 # Create a cached session factory
 @lru_cache()
 def get_session_factory() -> scoped_session:
     """Create a thread-safe session factory."""
     session_local = sessionmaker(
         bind=engine,
+        class_=RoutingSession,
+        registry=engine_registry,
         autocommit=False,
         autoflush=False,
         expire_on_commit=False,  # Prevent expired object issues
@@ -60,3 +140,66 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         session.close()
         session_factory.remove()  # Clean up the session from the registry
+
+
+# Create a cached async session factory
+@lru_cache()
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Create an async session factory bound to the async engine."""
+    return async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=RoutingSession,
+        registry=async_engine_registry,
+        autoflush=False,
+        expire_on_commit=False,  # Prevent expired object issues after await commit
+    )
+
+
+# Get async database session with proper connection management
+@asynccontextmanager
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session with proper connection management.
+
+    Async counterpart of get_db, every statement is awaited on the event loop
+    instead of blocking it.
+
+    Yields:
+        AsyncSession: SQLAlchemy async session object
+    """
+    session_factory = get_async_session_factory()
+    session = session_factory()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def get_request_session() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency opening one async session per request.
+
+    The session checks out one pooled connection per engine it uses (the
+    chosen replica and, after a write, the primary), keeps it for the whole
+    request and returns it to the pool after the single commit or rollback
+    at the end.
+
+    Declare it with Depends(get_request_session, scope="function"): the
+    commit then runs before the response is sent, and a failing commit is
+    answered as an error. With the default scope, FastAPI runs it after the
+    response has been sent.
+
+    Yields:
+        AsyncSession: SQLAlchemy async session object
+    """
+    session = get_async_session_factory()()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
@@ -0,0 +1,267 @@
+"""
+Streaming bulk loader of CrudMixin tables.
+
+NDJSON or CSV input is copied in batches with COPY FROM STDIN into a
+temporary staging table, then merged into the target table with uu_id,
+expiry and credential columns filled in. Only one batch of encoded rows is
+held at a time, so memory stays bounded whatever the size of the input.
+
+    cd application && python -m application.services.database.loader tags tags.ndjson
+"""
+
+import io
+import csv
+import sys
+import json
+import time
+import argparse
+
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+
+from sqlalchemy import Column, Engine, MetaData, Table, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+import application.schemas  # noqa: F401, registers the models on Base
+from application.services.database.database import Base, engine
+from application.services.database.metrics import labelled
+from application.services.database.result_cache import list_cache
+from application.services.database.controllers.mixin_controllers import CrudMixin
+
+
+# Value of expiry_ends for rows which do not give one, as the CrudMixin column default
+DEFAULT_EXPIRY_ENDS = "2099-12-31"
+
+
+def read_records(source: TextIO, format_: str = "ndjson") -> Iterator[dict]:
+    """
+    Read records from NDJSON or CSV lazily.
+
+    Args:
+        source: Text stream of the input
+        format_: "ndjson" or "csv", empty CSV fields are read as NULL
+
+    Returns:
+        Iterator of records
+    """
+    if format_ == "csv":
+        for row in csv.DictReader(source):
+            yield {key: value if value != "" else None for key, value in row.items()}
+        return
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+class CopyStream:
+    """File-like CSV encoding of records, read by COPY FROM STDIN as it goes."""
+
+    def __init__(self, records: Iterable[dict], columns: list[str]):
+        self.records = iter(records)
+        self.columns = columns
+        self.count = 0
+        self._pending = ""
+        self._buffer = io.StringIO()
+        # Values are quoted so an empty string stays distinct from an unquoted NULL
+        self._writer = csv.writer(self._buffer, quoting=csv.QUOTE_NOTNULL)
+
+    @staticmethod
+    def _value(value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return value if value is None else str(value)
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            record = next(self.records, None)
+            if record is None:
+                break
+            self._writer.writerow([self._value(record.get(column)) for column in self.columns])
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self.count += 1
+        if size < 0:
+            chunk, self._pending = self._pending, ""
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
+
+
+class BulkLoader:
+    """
+    COPY based loader of a CrudMixin model.
+
+    Attributes:
+        model: Target CrudMixin model
+        engine: Engine of the primary database
+        batch_size: Records copied and merged per transaction
+        person_id: Credential id stamped on created_by_id, if the table has it
+        person_name: Credential name stamped on created_by, if the table has it
+        progress: Called with (copied, merged, elapsed seconds) after every batch
+    """
+
+    def __init__(
+        self,
+        model: type[CrudMixin],
+        engine: Engine = engine,
+        batch_size: int = 50000,
+        person_id: Optional[int] = None,
+        person_name: Optional[str] = None,
+        progress: Optional[Callable[[int, int, float], None]] = None,
+    ):
+        self.model = model
+        self.table: Table = model.__table__
+        self.engine = engine
+        self.batch_size = batch_size
+        self.person_id = person_id
+        self.person_name = person_name
+        self.progress = progress or self.report
+
+    def report(self, copied: int, merged: int, elapsed: float) -> None:
+        """Print the progress of a load."""
+        rate = copied / elapsed if elapsed else 0
+        print(f"{self.table.name}: copied {copied} merged {merged} rows, {rate:.0f} rows/s")
+
+    def columns_of(self, record: dict) -> list[str]:
+        """Loadable columns of the table given by a record, in table order."""
+        return [
+            column.name for column in self.table.columns
+            if not column.primary_key and column.name in record
+        ]
+
+    def staging_table(self, columns: list[str]) -> Table:
+        """Temporary table of the loaded columns, all nullable, emptied by every commit."""
+        return Table(
+            f"staging_{self.table.name}",
+            MetaData(),
+            *[Column(name, self.table.c[name].type) for name in columns],
+            prefixes=["TEMPORARY"],
+            postgresql_on_commit="DELETE ROWS",
+        )
+
+    def fill_values(self) -> dict[str, Any]:
+        """SQL values of the columns the merge fills when the input leaves them empty."""
+        fills = {
+            "uu_id": func.gen_random_uuid(),
+            "expiry_starts": func.now(),
+            "expiry_ends": literal(DEFAULT_EXPIRY_ENDS, self.table.c.expiry_ends.type),
+        }
+        if self.person_id and self.person_name:
+            fills["created_by_id"] = literal(self.person_id)
+            fills["created_by"] = literal(self.person_name)
+        return {name: value for name, value in fills.items() if name in self.table.c}
+
+    def merge_statement(self, staging: Table, columns: list[str]):
+        """
+        INSERT ... SELECT of the staging rows into the table, skipping conflicts.
+
+        Args:
+            staging: Staging table of the batch
+            columns: Loaded columns
+
+        Returns:
+            Insert statement, its rowcount is the number of merged rows
+        """
+        fills = self.fill_values()
+        targets = list(columns) + [name for name in fills if name not in columns]
+        values = [
+            func.coalesce(staging.c[name], fills[name]) if name in fills else staging.c[name]
+            for name in columns
+        ] + [fills[name] for name in targets[len(columns):]]
+        return (
+            insert(self.table)
+            .from_select(targets, select(*values))
+            .on_conflict_do_nothing()
+        )
+
+    def load(self, records: Iterable[dict]) -> tuple[int, int]:
+        """
+        Copy and merge records in batches, one transaction per batch.
+
+        Args:
+            records: Records to load, consumed lazily; the first one decides the columns
+
+        Returns:
+            Numbers of copied and merged rows
+        """
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return 0, 0
+        records = chain([first], records)
+        columns = self.columns_of(first)
+        staging = self.staging_table(columns)
+        merge = self.merge_statement(staging, columns)
+        copied = merged = 0
+        started = time.perf_counter()
+        with labelled(self.model.__name__, "bulk_load"), self.engine.connect() as connection:
+            preparer = connection.dialect.identifier_preparer
+            copy = (
+                f"COPY {preparer.format_table(staging)} "
+                f"({', '.join(preparer.quote(name) for name in columns)}) "
+                f"FROM STDIN WITH (FORMAT csv)"
+            )
+            staging.create(connection)
+            connection.commit()
+            try:
+                while True:
+                    stream = CopyStream(islice(records, self.batch_size), columns)
+                    with connection.connection.cursor() as cursor:
+                        cursor.copy_expert(copy, stream)
+                    if not stream.count:
+                        break
+                    merged += connection.execute(merge).rowcount
+                    connection.commit()
+                    list_cache.invalidate(self.table.name)  # Core statements skip the Session events
+                    copied += stream.count
+                    self.progress(copied, merged, time.perf_counter() - started)
+            finally:  # The connection goes back to the pool, its temporary table must not
+                connection.rollback()
+                connection.connection.rollback()  # COPY runs on the DBAPI cursor, outside the Connection state
+                staging.drop(connection)
+                connection.commit()
+        return copied, merged
+
+
+def crud_models() -> dict[str, type[CrudMixin]]:
+    """CrudMixin models by table name."""
+    return {
+        mapper.class_.__tablename__: mapper.class_
+        for mapper in Base.registry.mappers
+        if issubclass(mapper.class_, CrudMixin)
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point, loads a file (or stdin) into a table of postgres_configs."""
+    models = crud_models()
+    parser = argparse.ArgumentParser(description="Bulk load NDJSON or CSV into a CrudMixin table")
+    parser.add_argument("table", choices=sorted(models))
+    parser.add_argument("path", nargs="?", default="-", help="Input file, - for stdin")
+    parser.add_argument("--format", dest="format_", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--person-id", type=int)
+    parser.add_argument("--person-name")
+    arguments = parser.parse_args(argv)
+
+    loader = BulkLoader(
+        models[arguments.table],
+        batch_size=arguments.batch_size,
+        person_id=arguments.person_id,
+        person_name=arguments.person_name,
+    )
+    source = sys.stdin if arguments.path == "-" else open(arguments.path, newline="", encoding="utf-8")
+    try:
+        copied, merged = loader.load(read_records(source, arguments.format_))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"{arguments.table}: done, {copied} rows copied, {merged} merged")
+
+
+if __name__ == "__main__":
+    main()
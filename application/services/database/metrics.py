@@ -0,0 +1,342 @@
+"""
+Prometheus metrics of the database connection pools and executed statements.
+
+Metrics are registered on the default prometheus_client registry, so they are
+served by the `/metrics` endpoint exposed by prometheus_fastapi_instrumentator.
+"""
+
+import re
+import time
+import random
+import inspect
+import logging
+import weakref
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out from the pool",
+    ["engine"],
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Overflow connections currently open above pool_size",
+    ["engine"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection, pre-ping included",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 10, 30),
+)
+POOL_PRE_PING_FAILURES = Counter(
+    "db_pool_pre_ping_failures_total",
+    "Pre-ping checks which found a dead connection",
+    ["engine"],
+)
+POOL_INVALIDATIONS = Counter(
+    "db_pool_invalidations_total",
+    "Connections invalidated (hard or soft)",
+    ["engine"],
+)
+POOL_RECYCLES = Counter(
+    "db_pool_recycles_total",
+    "Connections replaced at checkout because they were older than pool_recycle",
+    ["engine"],
+)
+REQUEST_CHECKOUTS = Histogram(
+    "db_request_checkouts",
+    "Pool checkouts made while serving a single request",
+    buckets=(0, 1, 2, 3, 5, 10, 20),
+)
+
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Statement execution time by model and calling mixin method",
+    ["model", "method", "statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "Statements slower than the slow query threshold",
+    ["model", "method"],
+)
+COMPILED_CACHE_LOOKUPS = Counter(
+    "db_compiled_cache_lookups_total",
+    "Statement executions by SQLAlchemy compiled cache result",
+    ["result"],
+)
+COMPILED_CACHE_HIT_RATIO = Gauge(
+    "db_compiled_cache_hit_ratio",
+    "Share of cacheable statement executions served from the compiled cache",
+)
+compiled_cache_stats = {"cache_hit": 0, "cache_miss": 0}
+COMPILED_CACHE_HIT_RATIO.set_function(
+    lambda: compiled_cache_stats["cache_hit"]
+    / max(1, compiled_cache_stats["cache_hit"] + compiled_cache_stats["cache_miss"])
+)
+
+IDENTITY_CACHE_LOOKUPS = Counter(
+    "db_identity_cache_lookups_total",
+    "Unique key lookups of the identity cache by model and result",
+    ["model", "result"],
+)
+IDENTITY_CACHE_ENTRIES = Gauge(
+    "db_identity_cache_entries",
+    "Rows held by the identity cache",
+)
+IDENTITY_CACHE_BYTES = Gauge(
+    "db_identity_cache_bytes",
+    "Approximate size of the values held by the identity cache",
+)
+LIST_CACHE_LOOKUPS = Counter(
+    "db_list_cache_lookups_total",
+    "Paginated list lookups of the result cache by table and result",
+    ["table", "result"],
+)
+LIST_NOT_MODIFIED = Counter(
+    "db_list_not_modified_total",
+    "Conditional list requests answered 304 by table and what validated them",
+    ["table", "validator"],
+)
+
+STATEMENT_VERBS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"})
+
+slow_query_logger = logging.getLogger("application.slow_queries")
+
+# (model, method) of the mixin call executing statements right now
+query_source: ContextVar[Optional[tuple[str, str]]] = ContextVar(
+    "query_source", default=None
+)
+
+
+class TimedPoolMixin:
+    """Pool mixin observing the time spent in connect() into POOL_CHECKOUT_WAIT."""
+
+    metrics_name: str = "default"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.metrics_name).observe(
+                time.perf_counter() - started
+            )
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    """QueuePool observing checkout wait time."""
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool observing checkout wait time."""
+
+
+# Engine labels whose pool metrics are already exported
+instrumented_engines: set[str] = set()
+
+
+def instrument_engine(engine: Engine, name: str, pool_recycle: float = -1) -> None:
+    """
+    Export the pool metrics of an engine under the given engine label.
+
+    A recycle is the pool closing a connection older than pool_recycle at
+    checkout and connecting the same pool entry again; aged connections
+    closed on checkin, disposal or invalidation are not counted.
+
+    Args:
+        engine: Sync engine, or sync_engine of an async engine
+        name: Value of the engine label
+        pool_recycle: pool_recycle the engine was created with, -1 if disabled
+    """
+    if name in instrumented_engines:  # The gauges stay bound to the engine which serves requests
+        return
+    instrumented_engines.add(name)
+    engine.pool.metrics_name = name
+    POOL_CHECKED_OUT.labels(name).set_function(lambda: engine.pool.checkedout())
+    POOL_OVERFLOW.labels(name).set_function(lambda: max(0, engine.pool.overflow()))
+
+    @event.listens_for(engine, "handle_error")
+    def count_pre_ping_failure(context):
+        if context.is_pre_ping:
+            POOL_PRE_PING_FAILURES.labels(name).inc()
+
+    @event.listens_for(engine, "invalidate")
+    @event.listens_for(engine, "soft_invalidate")
+    def count_invalidation(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATIONS.labels(name).inc()
+
+    aged = weakref.WeakSet()  # Pool entries whose connection was closed for its age
+
+    @event.listens_for(engine, "close")
+    def note_aged_close(dbapi_connection, connection_record):
+        if pool_recycle > -1 and time.time() - connection_record.starttime > pool_recycle:
+            aged.add(connection_record)
+
+    @event.listens_for(engine, "checkin")
+    def forget_aged_close(dbapi_connection, connection_record):
+        aged.discard(connection_record)  # Closed outside of a checkout, e.g. invalidated
+
+    @event.listens_for(engine, "connect")
+    def count_recycle(dbapi_connection, connection_record):
+        if connection_record in aged:
+            aged.discard(connection_record)
+            POOL_RECYCLES.labels(name).inc()
+
+
+@contextmanager
+def labelled(model: str, method: str) -> Iterator[None]:
+    """Label the statements executed inside the block with a model and method."""
+    token = query_source.set((model, method))
+    try:
+        yield
+    finally:
+        query_source.reset(token)
+
+
+def instrumented(method: Optional[str] = None) -> Callable:
+    """
+    Label the statements executed inside the decorated method with its model and name.
+
+    Args:
+        method: Label of the method, defaults to the function name
+
+    Returns:
+        Decorator for sync and async methods and classmethods
+    """
+
+    def decorator(function: Callable) -> Callable:
+        label = method or function.__name__
+
+        def model_of(owner: Any) -> str:
+            return (owner if isinstance(owner, type) else type(owner)).__name__
+
+        if inspect.iscoroutinefunction(function):
+
+            @wraps(function)
+            async def async_wrapper(owner, *args, **kwargs):
+                with labelled(model_of(owner), label):
+                    return await function(owner, *args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(function)
+        def wrapper(owner, *args, **kwargs):
+            with labelled(model_of(owner), label):
+                return function(owner, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace and replace inline literals of a statement."""
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    statement = re.sub(r"\b\d+(?:\.\d+)?\b", "?", statement)
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+def bind_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Describe bound parameters by their types, values are never logged."""
+    if executemany and parameters:
+        return {"rows": len(parameters), "shape": bind_shape(parameters[0])}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def explain_statement(connection, statement: str, parameters: Any) -> Optional[str]:
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) of a select statement inside a savepoint.
+
+    Args:
+        connection: Connection that executed the statement
+        statement: Statement text as sent to the DBAPI cursor
+        parameters: Parameters as sent to the DBAPI cursor
+
+    Returns:
+        Plan text, None if the plan could not be captured
+    """
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return "\n".join(str(row[0]) for row in cursor.fetchall())
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+    except Exception as e:
+        print(f"Error @Slow query explain: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def instrument_queries(
+    engine: Engine, slow_query_threshold: float, explain_rate: float = 0.0
+) -> None:
+    """
+    Observe every statement of an engine into QUERY_DURATION and log slow ones.
+
+    Args:
+        engine: Sync engine, or sync_engine of an async engine
+        slow_query_threshold: Seconds after which a statement is logged as slow
+        explain_rate: Share of slow selects sampled with EXPLAIN (ANALYZE, BUFFERS)
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def observe_duration(connection, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - connection.info["query_started"].pop()
+        model, method = query_source.get() or ("unknown", "unknown")
+        verb = statement.split(None, 1)[0].upper() if statement.strip() else ""
+        verb = verb if verb in STATEMENT_VERBS else "OTHER"
+        QUERY_DURATION.labels(model, method, verb).observe(elapsed)
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is not None:
+            cache_result = cache_hit.name.lower()
+            COMPILED_CACHE_LOOKUPS.labels(cache_result).inc()
+            if cache_result in compiled_cache_stats:
+                compiled_cache_stats[cache_result] += 1
+        if elapsed < slow_query_threshold:
+            return
+
+        SLOW_QUERIES.labels(model, method).inc()
+        plan = None
+        if verb == "SELECT" and explain_rate and random.random() < explain_rate:
+            plan = explain_statement(connection, statement, parameters)
+        slow_query_logger.warning(
+            "Slow query %.3fs %s.%s %s binds=%s%s",
+            elapsed,
+            model,
+            method,
+            normalize_statement(statement),
+            bind_shape(parameters, executemany),
+            f"\n{plan}" if plan else "",
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(context):
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
@@ -0,0 +1,453 @@
+"""
+Result cache of paginated list queries.
+
+Pages are cached under the model table and the normalized list options, in
+a pluggable backend: in-process, or any server speaking the Redis protocol.
+Every table has a tag version which is part of the keys; a commit touching
+the table increments it, so only the entries of that table go stale at
+once. Entries outliving their TTL are served stale while one background
+refresh recomputes them.
+
+Entries hold the encoded JSON body behind its entity tag, so a conditional
+request is answered 304 from the tag alone and a hit is sent as it is,
+without querying or serializing again.
+"""
+
+import json
+import time
+import logging
+import socket
+import hashlib
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from application.api_config import api_configs
+from application.controllers.response_controllers import etag_matches, render_json
+from application.services.database.metrics import LIST_CACHE_LOOKUPS, LIST_NOT_MODIFIED
+
+
+# Session.info key of the tables to invalidate once committed
+PENDING_TAGS = "list_cache_tags"
+
+list_cache_logger = logging.getLogger("application.list_cache")
+
+
+def entity_tag(data: bytes) -> str:
+    """Opaque entity tag of some bytes, quoted as in an ETag header."""
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+class CacheBackend:
+    """Interface of result cache backends, values are bytes and TTLs are seconds."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set a key only if it does not exist, True if it was set."""
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class InMemoryBackend(CacheBackend):
+    """
+    Process local backend, an LRU of at most maxsize keys.
+
+    Tag versions are local too, so every worker process must run its own
+    commits for invalidation to reach it; use RedisBackend with several workers.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, tuple[Optional[float], bytes]] = OrderedDict()
+
+    def _alive(self, key: str) -> Optional[bytes]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] is not None and item[0] < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return item[1]
+
+    def _store(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        self._items[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._alive(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        with self._lock:
+            if self._alive(key) is not None:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._alive(key) or 0) + 1
+            self._store(key, str(value).encode(), None)
+            return value
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend speaking the Redis protocol (RESP) over one socket per thread.
+
+    Works with Redis, Valkey or any local stand-in implementing GET, SET (PX,
+    NX), INCR, SELECT and AUTH; no client library is needed.
+
+    Attributes:
+        url: redis://[:password@]host[:port][/db]
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        self.url = url
+        self.timeout = timeout
+        parsed = urlparse(url)
+        self._address = (parsed.hostname or "localhost", parsed.port or 6379)
+        self._password = parsed.password
+        self._db = int((parsed.path or "/0").lstrip("/") or 0)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: set[socket.socket] = set()
+
+    def _connect(self):
+        connection = socket.create_connection(self._address, timeout=self.timeout)
+        with self._lock:
+            self._connections.add(connection)
+        self._local.socket = connection
+        self._local.reader = connection.makefile("rb")
+        if self._password:
+            self._command("AUTH", self._password)
+        if self._db:
+            self._command("SELECT", self._db)
+
+    def _close(self) -> None:
+        for name in ("reader", "socket"):
+            resource = getattr(self._local, name, None)
+            if resource is not None:
+                resource.close()
+                setattr(self._local, name, None)
+                with self._lock:
+                    self._connections.discard(resource)
+
+    def _read(self) -> Any:
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            return None if length < 0 else self._local.reader.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise RuntimeError(f"Unknown reply {line!r}")
+
+    def _command(self, *args: Any) -> Any:
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        payload = b"*%d\r\n" % len(parts) + b"".join(
+            b"$%d\r\n%s\r\n" % (len(part), part) for part in parts
+        )
+        self._local.socket.sendall(payload)
+        return self._read()
+
+    def execute(self, *args: Any) -> Any:
+        """Send a command, reconnecting once if the connection was lost."""
+        for attempt in range(2):
+            try:
+                if getattr(self._local, "socket", None) is None:
+                    self._connect()
+                return self._command(*args)
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt:
+                    raise
+
+    def close(self) -> None:
+        """Close the connections of every thread, they reconnect on their next command."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            connection.close()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)), "NX") is not None
+
+    def incr(self, key: str) -> int:
+        return self.execute("INCR", key)
+
+
+class ListResultCache:
+    """
+    Cache of list results keyed on model table, tag version and list options.
+
+    Attributes:
+        backend: Cache backend, None disables caching
+        ttl: Seconds an entry is fresh
+        stale_ttl: Seconds after ttl an entry is still served while it is refreshed
+        prefix: Prefix of every key of the backend
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend],
+        ttl: float = 5.0,
+        stale_ttl: float = 30.0,
+        prefix: str = "list",
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="list-cache-refresh")
+
+    @staticmethod
+    def normalize(options: Any) -> dict:
+        """List options with defaults filled in, so equal requests share an entry."""
+        if isinstance(options, BaseModel):
+            options = options.model_dump()
+        options = dict(options or {})
+        options["order_field"] = list(options.get("order_field") or ["uu_id"])
+        options["order_type"] = list(options.get("order_type") or ["asc"])
+        return options
+
+    def tag_key(self, table: str) -> str:
+        return f"{self.prefix}:tag:{table}"
+
+    def key(self, table: str, options: Any) -> str:
+        """Backend key of a list, it changes whenever the table is invalidated."""
+        version = int(self.backend.get(self.tag_key(table)) or 0)
+        body = json.dumps(self.normalize(options), sort_keys=True, default=str)
+        digest = hashlib.sha256(body.encode()).hexdigest()[:32]
+        return f"{self.prefix}:{table}:{version}:{digest}"
+
+    def store(self, key: str, body: bytes, etag: str) -> None:
+        """Store an encoded body, as "fresh_until|etag|body"."""
+        header = f"{time.time() + self.ttl:.3f}|{etag}|".encode()
+        self.backend.set(key, header + body, self.ttl + self.stale_ttl)
+
+    @staticmethod
+    def parse(raw: bytes) -> Optional[tuple[float, str, bytes]]:
+        """(fresh_until, etag, body) of a stored entry, None for entries of another format."""
+        try:
+            fresh_until, etag, body = raw.split(b"|", 2)
+            return float(fresh_until), etag.decode(), body
+        except ValueError:
+            return None
+
+    def refresh(self, key: str, compute: Callable[[], Any]) -> None:
+        try:
+            body = render_json(compute())
+            self.store(key, body, entity_tag(body))
+        except Exception as e:
+            list_cache_logger.warning("List cache refresh of %s failed: %s", key, e)
+
+    @staticmethod
+    def not_modified(table: str, if_none_match: Optional[str], etag: str, validator: str) -> bool:
+        """Check if the client already has the body of an entity tag, counting the 304s."""
+        if not etag_matches(if_none_match, {etag}):
+            return False
+        LIST_NOT_MODIFIED.labels(table, validator).inc()
+        return True
+
+    def fetch(self, model: Any, options: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Read a list result through the cache.
+
+        Args:
+            model: Model of the list, its table tags the entry
+            options: ListOptions (or a dictionary of them) of the list
+            compute: Builds the result when it is not cached, must be JSON serializable
+
+        Returns:
+            Fresh or stale cached result, or the computed one, as decoded from JSON
+        """
+        body, _ = self.fetch_conditional(model, options, compute)
+        return json.loads(body)
+
+    def fetch_conditional(
+        self,
+        model: Any,
+        options: Any,
+        compute: Callable[[], Any],
+        if_none_match: Optional[str] = None,
+        validate: Optional[Callable[[], Optional[str]]] = None,
+    ) -> tuple[Optional[bytes], str]:
+        """
+        Read the encoded body of a list result through the cache, for a conditional GET.
+
+        A cached entry is checked against If-None-Match before its body is
+        read, so a client holding the current body costs one cache lookup.
+        Without a backend, or when it fails, validate (e.g.
+        PostgresResponse.validator) lets a 304 be answered before the page
+        is queried.
+
+        Args:
+            model: Model of the list, its table tags the entry
+            options: ListOptions (or a dictionary of them) of the list
+            compute: Builds the result when it is not cached, must be JSON serializable
+            if_none_match: If-None-Match header of the request
+            validate: Cheap validator of the rows of the list, used without a working backend
+
+        Returns:
+            (encoded body, None when the client has it already; entity tag)
+        """
+        table = model.__table__.name
+        if self.backend is None:
+            return self.compute_conditional(table, options, compute, if_none_match, validate)
+        try:
+            key = self.key(table, options)
+            raw = self.backend.get(key)
+        except Exception as e:
+            list_cache_logger.warning("List cache of %s failed: %s", table, e)
+            LIST_CACHE_LOOKUPS.labels(table, "error").inc()
+            return self.compute_conditional(table, options, compute, if_none_match, validate)
+
+        entry = self.parse(raw) if raw is not None else None
+        if entry is not None:
+            fresh_until, etag, body = entry
+            if fresh_until > time.time():
+                LIST_CACHE_LOOKUPS.labels(table, "hit").inc()
+            else:
+                LIST_CACHE_LOOKUPS.labels(table, "stale").inc()
+                try:  # One worker refreshes, every other request keeps reading the stale entry
+                    if self.backend.add(f"{key}:refresh", b"1", self.ttl):
+                        self._refresher.submit(self.refresh, key, compute)
+                except Exception as e:
+                    list_cache_logger.warning("List cache of %s failed: %s", table, e)
+            if self.not_modified(table, if_none_match, etag, "cache"):
+                return None, etag
+            return body, etag
+
+        LIST_CACHE_LOOKUPS.labels(table, "miss").inc()
+        body = render_json(compute())
+        etag = entity_tag(body)
+        try:
+            self.store(key, body, etag)
+        except Exception as e:
+            list_cache_logger.warning("List cache of %s failed: %s", table, e)
+        if self.not_modified(table, if_none_match, etag, "content"):
+            return None, etag
+        return body, etag
+
+    def compute_conditional(
+        self,
+        table: str,
+        options: Any,
+        compute: Callable[[], Any],
+        if_none_match: Optional[str] = None,
+        validate: Optional[Callable[[], Optional[str]]] = None,
+    ) -> tuple[Optional[bytes], str]:
+        """
+        Conditional read of a list result which is not cached.
+
+        The entity tag is derived from the validator and the list options
+        when the model has one, the result is then only computed for clients
+        which do not have it. Otherwise it is the hash of the computed body,
+        which saves the transfer but not the query.
+        """
+        validator = validate() if validate is not None else None
+        if validator is not None:
+            body = json.dumps(self.normalize(options), sort_keys=True, default=str)
+            etag = entity_tag(f"{table}|{validator}|{body}".encode())
+            if self.not_modified(table, if_none_match, etag, "validator"):
+                return None, etag
+            return render_json(compute()), etag
+        body = render_json(compute())
+        etag = entity_tag(body)
+        if self.not_modified(table, if_none_match, etag, "content"):
+            return None, etag
+        return body, etag
+
+    def invalidate(self, table: str) -> None:
+        """Make every cached list of a table stale at once."""
+        if self.backend is None:
+            return
+        try:
+            self.backend.incr(self.tag_key(table))
+        except Exception as e:
+            list_cache_logger.warning("List cache invalidate of %s failed: %s", table, e)
+
+
+def backend_from_configs() -> Optional[CacheBackend]:
+    """Backend chosen by API_LIST_CACHE_BACKEND: none, memory or redis."""
+    if api_configs.LIST_CACHE_BACKEND == "memory":
+        return InMemoryBackend()
+    if api_configs.LIST_CACHE_BACKEND == "redis":
+        return RedisBackend(api_configs.LIST_CACHE_URL)
+    return None
+
+
+list_cache = ListResultCache(
+    backend=backend_from_configs(),
+    ttl=api_configs.LIST_CACHE_TTL,
+    stale_ttl=api_configs.LIST_CACHE_STALE_TTL,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_tags(session: Session, flush_context) -> None:
+    """Remember the tables this flush wrote, their lists are invalidated on commit."""
+    tags = session.info.setdefault(PENDING_TAGS, set())
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        tags.add(inspect(instance).mapper.local_table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_bulk_tags(orm_execute_state) -> None:
+    """Bulk INSERT/UPDATE/DELETE statements write the table of their model."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        orm_execute_state.session.info.setdefault(PENDING_TAGS, set()).add(mapper.local_table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_tags(session: Session) -> None:
+    """Invalidate the lists of the tables the committed transaction wrote."""
+    for table in session.info.pop(PENDING_TAGS, ()):
+        list_cache.invalidate(table)
+
+
+@event.listens_for(Session, "after_rollback")
+def drop_tags(session: Session) -> None:
+    session.info.pop(PENDING_TAGS, None)
@@ -0,0 +1,146 @@
+"""
+Read replica routing for SQLAlchemy sessions.
+
+Reads are sent to a healthy streaming replica, writes and every statement of a
+session that already wrote are sent to the primary (read-your-writes).
+"""
+
+import time
+
+from itertools import count
+from typing import Any, Optional
+
+from sqlalchemy import Engine, Delete, Insert, Update, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+
+# Session.info key marking a session that must keep reading from the primary
+STICKY_PRIMARY = "sticky_primary"
+
+# Replay lag in seconds, an idle replica that replayed everything it received has no lag
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class EngineRegistry:
+    """
+    Registry of the primary engine and its streaming replica engines.
+
+    Attributes:
+        primary: Engine of the primary server
+        replicas: Engines of the replica servers
+        strategy: "round_robin" or "least_connections"
+        max_lag: Replay lag in seconds after which a replica is skipped
+        lag_check_interval: Seconds a measured lag is trusted before measuring again
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: Optional[list[Engine]] = None,
+        strategy: str = "round_robin",
+        max_lag: float = 5.0,
+        lag_check_interval: float = 5.0,
+    ):
+        self.primary = primary
+        self.replicas = replicas or []
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self._round_robin = count()
+        self._lag_checks: dict[Engine, tuple[float, bool]] = {}
+
+    @property
+    def engines(self) -> list[Engine]:
+        """All engines of the registry, primary first."""
+        return [self.primary, *self.replicas]
+
+    def is_lagging(self, replica: Engine) -> bool:
+        """
+        Check if a replica is behind the primary more than max_lag.
+
+        Args:
+            replica: Replica engine
+
+        Returns:
+            True if the replica is lagging or unreachable
+        """
+        now = time.monotonic()
+        checked_at, lagging = self._lag_checks.get(replica, (None, False))
+        if checked_at is not None and now - checked_at < self.lag_check_interval:
+            return lagging
+        try:
+            with replica.connect() as connection:
+                lag = connection.execute(REPLICA_LAG_QUERY).scalar()
+            lagging = float(lag or 0) > self.max_lag
+        except Exception as e:
+            print(f"Error @Replica lag check: {e}")
+            lagging = True
+        self._lag_checks[replica] = (now, lagging)
+        return lagging
+
+    def reader(self) -> Engine:
+        """
+        Choose the engine to read from.
+
+        Returns:
+            A replica which is not lagging, the primary when none is available
+        """
+        healthy = [replica for replica in self.replicas if not self.is_lagging(replica)]
+        if not healthy:
+            return self.primary
+        if self.strategy == "least_connections":
+            return min(healthy, key=lambda replica: replica.pool.checkedout())
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def writer(self) -> Engine:
+        """Choose the engine to write to."""
+        return self.primary
+
+
+class RoutingSession(Session):
+    """
+    Session routing reads to replicas and writes to the primary.
+
+    The replica is chosen once per session so every read of a request uses
+    the same replica connection. Usable as sync_session_class of an AsyncSession, the
+    registry then holds the sync_engine of the async engines.
+    """
+
+    def __init__(self, *args, registry: EngineRegistry, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.registry = registry
+        self._reader: Optional[Engine] = None
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs) -> Engine:
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)) or is_raw_write(clause):
+            self.info[STICKY_PRIMARY] = True
+            return self.registry.writer()
+        if self.info.get(STICKY_PRIMARY):
+            return self.registry.writer()
+        if self._reader is None:
+            self._reader = self.registry.reader()
+        return self._reader
+
+    def close(self) -> None:
+        super().close()
+        self._reader = None
+        self.info.pop(STICKY_PRIMARY, None)
+
+
+def is_raw_write(clause: Any) -> bool:
+    """Textual statements may write, unless marked with execution_options(read_only=True)."""
+    return isinstance(clause, TextClause) and not clause.get_execution_options().get("read_only")
+
+
+def stick_to_primary(db: Any) -> None:
+    """
+    Send every following statement of the session to the primary.
+
+    Args:
+        db: Session or AsyncSession
+    """
+    db.info[STICKY_PRIMARY] = True
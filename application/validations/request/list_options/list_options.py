@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 
@@ -8,3 +8,6 @@ class ListOptions(BaseModel):
     order_field: Optional[list[str]] = None
     order_type: Optional[list[str]] = None
     query: Optional[dict] = None
+    count_mode: Optional[Literal["exact", "window", "estimated", "none"]] = None
+    cursor: Optional[str] = None
+    fields: Optional[list[str]] = None